@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Iterable
+
+ANSWER_INDEX_VERSION = 1
+
+
+def puzzle_answers(payload: dict) -> list[str]:
+    answers: list[str] = []
+    for direction_entries in payload.get("entries", {}).values():
+        for entry in direction_entries:
+            answer = entry.get("answer")
+            if answer:
+                answers.append(answer)
+    return answers
+
+
+def iter_puzzle_files(roots: Iterable[Path]) -> Iterable[Path]:
+    for root in roots:
+        if root.is_dir():
+            yield from sorted(root.rglob("puzzle_*.json"))
+
+
+# Inverted index from answer to the ids of the puzzles that use it. On disk it is an
+# append-only JSON-lines log (one line per added or removed puzzle), so recording a
+# new puzzle costs one appended line no matter how large the bank is.
+class AnswerIndex:
+    def __init__(self, path: Path | None = None):
+        self.path = path
+        self._puzzles_by_answer: dict[str, set[str]] = {}
+        self._answers_by_puzzle: dict[str, list[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._answers_by_puzzle)
+
+    def __contains__(self, puzzle_id: str) -> bool:
+        return puzzle_id in self._answers_by_puzzle
+
+    def usage(self, answer: str) -> int:
+        return len(self._puzzles_by_answer.get(answer, ()))
+
+    def puzzles_for(self, answer: str) -> set[str]:
+        return self._puzzles_by_answer.get(answer, set())
+
+    def most_used(self, count: int) -> list[tuple[str, int]]:
+        usage = [(answer, len(ids)) for answer, ids in self._puzzles_by_answer.items()]
+        usage.sort(key=lambda item: (-item[1], item[0]))
+        return usage[:count]
+
+    def overused(self, max_uses: int) -> set[str]:
+        return {answer for answer, ids in self._puzzles_by_answer.items() if len(ids) >= max_uses}
+
+    def _apply_add(self, puzzle_id: str, answers: list[str]) -> None:
+        self._apply_remove(puzzle_id)
+        self._answers_by_puzzle[puzzle_id] = answers
+        for answer in answers:
+            self._puzzles_by_answer.setdefault(answer, set()).add(puzzle_id)
+
+    def _apply_remove(self, puzzle_id: str) -> None:
+        for answer in self._answers_by_puzzle.pop(puzzle_id, []):
+            ids = self._puzzles_by_answer.get(answer)
+            if ids is None:
+                continue
+            ids.discard(puzzle_id)
+            if not ids:
+                del self._puzzles_by_answer[answer]
+
+    def _append(self, record: dict) -> None:
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        new_file = not self.path.exists()
+        with self.path.open("a", encoding="utf-8") as handle:
+            if new_file:
+                handle.write(json.dumps({"version": ANSWER_INDEX_VERSION}) + "\n")
+            handle.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+    def add_puzzle(self, puzzle_id: str, answers: list[str]) -> None:
+        if self._answers_by_puzzle.get(puzzle_id) == answers:
+            return
+        self._apply_add(puzzle_id, answers)
+        self._append({"id": puzzle_id, "answers": answers})
+
+    def remove_puzzle(self, puzzle_id: str) -> None:
+        if puzzle_id not in self._answers_by_puzzle:
+            return
+        self._apply_remove(puzzle_id)
+        self._append({"id": puzzle_id, "removed": True})
+
+    def save(self) -> None:
+        # Rewrites the log with one line per live puzzle, dropping removals.
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        with tmp_path.open("w", encoding="utf-8") as handle:
+            handle.write(json.dumps({"version": ANSWER_INDEX_VERSION}) + "\n")
+            for puzzle_id, answers in self._answers_by_puzzle.items():
+                record = {"id": puzzle_id, "answers": answers}
+                handle.write(json.dumps(record, separators=(",", ":")) + "\n")
+        os.replace(tmp_path, self.path)
+
+    @classmethod
+    def load(cls, path: Path) -> AnswerIndex | None:
+        if not path.exists():
+            return None
+        index = cls(path)
+        with path.open("r", encoding="utf-8") as handle:
+            header = handle.readline()
+            try:
+                if json.loads(header).get("version") != ANSWER_INDEX_VERSION:
+                    return None
+            except (json.JSONDecodeError, AttributeError):
+                return None
+            for line in handle:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn final line from an interrupted append.
+                    continue
+                if record.get("removed"):
+                    index._apply_remove(record["id"])
+                else:
+                    index._apply_add(record["id"], record["answers"])
+        return index
+
+    @classmethod
+    def build(cls, path: Path | None, roots: Iterable[Path]) -> AnswerIndex:
+        index = cls(path)
+        for puzzle_path in iter_puzzle_files(roots):
+            try:
+                payload = json.loads(puzzle_path.read_text())
+            except json.JSONDecodeError:
+                continue
+            puzzle_id = payload.get("id")
+            if puzzle_id:
+                index._apply_add(puzzle_id, puzzle_answers(payload))
+        index.save()
+        return index
+
+
+def load_or_build(path: Path, roots: Iterable[Path]) -> AnswerIndex:
+    index = AnswerIndex.load(path)
+    if index is None:
+        index = AnswerIndex.build(path, roots)
+    return index
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import json
+import os
+from itertools import combinations
+from pathlib import Path
+from typing import Iterable, List, Tuple
+
+CATALOG_FORMAT_VERSION = 1
+MAX_BLACK_CELLS = 4
+
+BlackSets = List[List[Tuple[int, int]]]
+
+
+class GridMasks:
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.full = (1 << (width * height)) - 1
+        left_col = sum(1 << (row * width) for row in range(height))
+        right_col = left_col << (width - 1)
+        self.not_left = self.full & ~left_col
+        self.not_right = self.full & ~right_col
+
+        self.border: list[tuple[int, int]] = []
+        for row in range(height):
+            for col in range(width):
+                if row == 0 or col == 0 or row == height - 1 or col == width - 1:
+                    self.border.append((row, col))
+
+        top_row = (1 << width) - 1
+        bottom_row = top_row << ((height - 1) * width)
+        corner_masks = {
+            "top": self.bit(0, 0) | self.bit(0, width - 1),
+            "bottom": self.bit(height - 1, 0) | self.bit(height - 1, width - 1),
+            "left": self.bit(0, 0) | self.bit(height - 1, 0),
+            "right": self.bit(0, width - 1) | self.bit(height - 1, width - 1),
+        }
+        self.valid_corners: dict[int, int] = {}
+        for row, col in self.border:
+            bit = self.bit(row, col)
+            valid = 0
+            if bit & top_row:
+                valid |= corner_masks["top"]
+            if bit & bottom_row:
+                valid |= corner_masks["bottom"]
+            if bit & left_col:
+                valid |= corner_masks["left"]
+            if bit & right_col:
+                valid |= corner_masks["right"]
+            self.valid_corners[bit] = valid
+
+    def bit(self, row: int, col: int) -> int:
+        return 1 << (row * self.width + col)
+
+    def mask_of(self, cells: Iterable[tuple[int, int]]) -> int:
+        mask = 0
+        for row, col in cells:
+            mask |= self.bit(row, col)
+        return mask
+
+    def horizontal_neighbors(self, mask: int) -> int:
+        return ((mask << 1) & self.not_left) | ((mask >> 1) & self.not_right)
+
+    def vertical_neighbors(self, mask: int) -> int:
+        return ((mask << self.width) | (mask >> self.width)) & self.full
+
+    def corners_ok(self, black: int) -> bool:
+        remaining = black
+        while remaining:
+            component = remaining & -remaining
+            while True:
+                grown = component | (
+                    (self.horizontal_neighbors(component) | self.vertical_neighbors(component)) & black
+                )
+                if grown == component:
+                    break
+                component = grown
+            remaining &= ~component
+
+            cells = component
+            while cells:
+                low = cells & -cells
+                if not component & self.valid_corners[low]:
+                    return False
+                cells ^= low
+        return True
+
+    def no_singletons(self, black: int) -> bool:
+        open_cells = self.full & ~black
+        covered = open_cells & (
+            self.horizontal_neighbors(open_cells) | self.vertical_neighbors(open_cells)
+        )
+        return bool(covered) and covered == open_cells
+
+
+def enumerate_black_sets(width: int, height: int, max_black: int = MAX_BLACK_CELLS) -> BlackSets:
+    masks = GridMasks(width, height)
+    valid: BlackSets = []
+    for count in range(0, max_black + 1):
+        for combo in combinations(masks.border, count):
+            black = masks.mask_of(combo)
+            if not masks.corners_ok(black):
+                continue
+            if not masks.no_singletons(black):
+                continue
+            valid.append(list(combo))
+    return valid
+
+
+def build_catalog(
+    sizes: Iterable[tuple[int, int]], max_black: int = MAX_BLACK_CELLS
+) -> dict[tuple[int, int], BlackSets]:
+    return {(width, height): enumerate_black_sets(width, height, max_black) for width, height in sizes}
+
+
+def save_catalog(
+    path: Path, catalog: dict[tuple[int, int], BlackSets], max_black: int = MAX_BLACK_CELLS
+) -> None:
+    payload = {
+        "version": CATALOG_FORMAT_VERSION,
+        "maxBlack": max_black,
+        "sizes": {
+            f"{width}x{height}": [[[r, c] for r, c in black_set] for black_set in black_sets]
+            for (width, height), black_sets in catalog.items()
+        },
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(json.dumps(payload, separators=(",", ":")))
+    os.replace(tmp_path, path)
+
+
+def load_catalog(
+    path: Path, max_black: int = MAX_BLACK_CELLS
+) -> dict[tuple[int, int], BlackSets] | None:
+    if not path.exists():
+        return None
+    try:
+        payload = json.loads(path.read_text())
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(payload, dict):
+        return None
+    if payload.get("version") != CATALOG_FORMAT_VERSION or payload.get("maxBlack") != max_black:
+        return None
+
+    catalog: dict[tuple[int, int], BlackSets] = {}
+    for size, black_sets in payload.get("sizes", {}).items():
+        width, height = (int(part) for part in size.split("x"))
+        catalog[(width, height)] = [[(r, c) for r, c in black_set] for black_set in black_sets]
+    return catalog
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import hashlib
+import mmap
+import os
+import struct
+from pathlib import Path
+
+from .wordlist import CATEGORIES, DEFAULT_CACHE_SIZE, BitsetWordIndex, PatternCache, load_words
+
+MAGIC = b"MCWIDX01"
+FORMAT_VERSION = 1
+LETTERS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+SOURCE_FILES = [f"{category}.txt" for category in CATEGORIES] + ["allowlist.txt", "banlist.txt"]
+
+# magic, version, min_len, max_len, source digest, bucket count
+HEADER = struct.Struct("<8sIHH32sI")
+# word length, word count, words offset, masks offset
+BUCKET = struct.Struct("<HIQQ")
+
+
+def source_digest(wordlists_dir: Path, min_len: int, max_len: int) -> bytes:
+    digest = hashlib.sha256()
+    digest.update(f"v{FORMAT_VERSION}:{min_len}:{max_len}".encode("ascii"))
+    for name in SOURCE_FILES:
+        path = wordlists_dir / name
+        digest.update(b"\0" + name.encode("ascii") + b"\0")
+        if path.exists():
+            digest.update(path.read_bytes())
+    return digest.digest()
+
+
+def compile_word_index(wordlists_dir: Path, output_path: Path, min_len: int, max_len: int) -> Path:
+    word_data = load_words(wordlists_dir, min_len, max_len)
+    digest = source_digest(wordlists_dir, min_len, max_len)
+
+    lengths = sorted(word_data.by_length)
+    offset = HEADER.size + BUCKET.size * len(lengths)
+    buckets: list[bytes] = []
+    payload: list[bytes] = []
+    for length in lengths:
+        words = word_data.by_length[length]
+        mask_bytes = (len(words) + 7) // 8
+        masks = [[0] * len(LETTERS) for _ in range(length)]
+        for idx, word in enumerate(words):
+            bit = 1 << idx
+            for pos, ch in enumerate(word):
+                masks[pos][ord(ch) - 65] |= bit
+
+        words_blob = "".join(words).encode("ascii")
+        masks_blob = b"".join(
+            mask.to_bytes(mask_bytes, "little") for position in masks for mask in position
+        )
+        buckets.append(BUCKET.pack(length, len(words), offset, offset + len(words_blob)))
+        payload.append(words_blob)
+        payload.append(masks_blob)
+        offset += len(words_blob) + len(masks_blob)
+
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, min_len, max_len, digest, len(lengths))
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output_path.with_name(f"{output_path.name}.{os.getpid()}.tmp")
+    with tmp_path.open("wb") as handle:
+        handle.write(header)
+        handle.writelines(buckets)
+        handle.writelines(payload)
+    os.replace(tmp_path, output_path)
+    return output_path
+
+
+def read_compiled_digest(path: Path) -> bytes | None:
+    if not path.exists():
+        return None
+    with path.open("rb") as handle:
+        raw = handle.read(HEADER.size)
+    if len(raw) != HEADER.size:
+        return None
+    magic, version, _, _, digest, _ = HEADER.unpack(raw)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        return None
+    return digest
+
+
+def compiled_source_digest(path: Path, wordlists_dir: Path) -> bytes | None:
+    # Digest of wordlists_dir for the word lengths compiled into path.
+    if read_compiled_digest(path) is None:
+        return None
+    with path.open("rb") as handle:
+        _, _, min_len, max_len, _, _ = HEADER.unpack(handle.read(HEADER.size))
+    return source_digest(wordlists_dir, min_len, max_len)
+
+
+class CompiledWordIndex(BitsetWordIndex):
+    def __init__(self, path: Path, cache_size: int = DEFAULT_CACHE_SIZE):
+        self.path = path
+        self.by_length: dict[int, list[str]] = {}
+        self._masks: dict[int, list[dict[str, int]]] = {}
+        self._full_masks: dict[int, int] = {}
+        self._word_bits: dict[str, int] | None = None
+        self.cache = PatternCache(cache_size)
+
+        with path.open("rb") as handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            magic, version, min_len, max_len, digest, bucket_count = HEADER.unpack_from(view, 0)
+            if magic != MAGIC or version != FORMAT_VERSION:
+                raise ValueError(f"Not a compiled word index (v{FORMAT_VERSION}): {path}")
+            self.min_len = min_len
+            self.max_len = max_len
+            self.digest = digest
+            for bucket in range(bucket_count):
+                length, count, words_offset, masks_offset = BUCKET.unpack_from(
+                    view, HEADER.size + bucket * BUCKET.size
+                )
+                blob = view[words_offset : words_offset + count * length].decode("ascii")
+                self.by_length[length] = [blob[i : i + length] for i in range(0, len(blob), length)]
+
+                mask_bytes = (count + 7) // 8
+                positions: list[dict[str, int]] = []
+                cursor = masks_offset
+                for _ in range(length):
+                    letters: dict[str, int] = {}
+                    for letter in LETTERS:
+                        mask = int.from_bytes(view[cursor : cursor + mask_bytes], "little")
+                        if mask:
+                            letters[letter] = mask
+                        cursor += mask_bytes
+                    positions.append(letters)
+                self._masks[length] = positions
+                self._full_masks[length] = (1 << count) - 1
+
+                # Words removed in place keep their slot in the file but have no letter
+                # bits left. Compact the bucket to its live words (renumbering the bits)
+                # so by_length matches the masks, as in BitsetWordIndex.
+                live = 0
+                for mask in positions[0].values() if positions else ():
+                    live |= mask
+                if live != self._full_masks[length]:
+                    self.by_length[length] = [
+                        word for idx, word in enumerate(self.by_length[length]) if live >> idx & 1
+                    ]
+                    self._build_bucket(length)
+
+        self.words = sorted(word for words in self.by_length.values() for word in words)
+
+
+def remove_compiled_words(
+    path: Path, wordlists_dir: Path, words: set[str], previous_digest: bytes
+) -> int | None:
+    # Clears the letter bits of words that the (already edited) wordlists no longer
+    # produce and stamps their new digest, so a purge does not force the next engine
+    # start to recompile everything. previous_digest is compiled_source_digest() from
+    # before the edit; an index that was already stale then is left alone (None) so
+    # the next engine start rebuilds it.
+    removed = 0
+    with path.open("r+b") as handle, mmap.mmap(handle.fileno(), 0) as view:
+        magic, version, min_len, max_len, stamped, bucket_count = HEADER.unpack_from(view, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"Not a compiled word index (v{FORMAT_VERSION}): {path}")
+        if stamped != previous_digest:
+            return None
+        words = words - set(load_words(wordlists_dir, min_len, max_len).words)
+        digest = source_digest(wordlists_dir, min_len, max_len)
+        for bucket in range(bucket_count):
+            length, count, words_offset, masks_offset = BUCKET.unpack_from(
+                view, HEADER.size + bucket * BUCKET.size
+            )
+            blob = view[words_offset : words_offset + count * length].decode("ascii")
+            mask_bytes = (count + 7) // 8
+            for word in words:
+                if len(word) != length:
+                    continue
+                position = blob.find(word)
+                while position >= 0 and position % length:
+                    position = blob.find(word, position + 1)
+                if position < 0:
+                    continue
+                idx = position // length
+                byte_offset, bit = divmod(idx, 8)
+                for pos, ch in enumerate(word):
+                    cursor = masks_offset + (pos * len(LETTERS) + ord(ch) - 65) * mask_bytes
+                    view[cursor + byte_offset] &= ~(1 << bit) & 0xFF
+                removed += 1
+        HEADER.pack_into(view, 0, magic, version, min_len, max_len, digest, bucket_count)
+        view.flush()
+    return removed
+
+
+def load_or_compile(
+    wordlists_dir: Path,
+    index_path: Path,
+    min_len: int,
+    max_len: int,
+    cache_size: int = DEFAULT_CACHE_SIZE,
+) -> CompiledWordIndex:
+    if read_compiled_digest(index_path) != source_digest(wordlists_dir, min_len, max_len):
+        compile_word_index(wordlists_dir, index_path, min_len, max_len)
+    return CompiledWordIndex(index_path, cache_size=cache_size)
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import math
+import random
+import weakref
+from typing import Sequence, TypeVar
+
+T = TypeVar("T")
+
+_CROSSING_TABLES: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+class CrossingTables:
+    # Per (length, position): how many words carry each letter there. A crossing
+    # letter no word of the other slot supports fails at once, and these counts
+    # answer most forward checks without building a pattern. Built from by_length,
+    # which holds only live words (see BitsetWordIndex).
+    def __init__(self, by_length: dict[int, list[str]]):
+        self.totals = {length: len(words) for length, words in by_length.items()}
+        self.support: dict[tuple[int, int], list[int]] = {}
+        for length, words in by_length.items():
+            for position in range(length):
+                counts = [0] * 26
+                for word in words:
+                    counts[ord(word[position]) - 65] += 1
+                self.support[length, position] = counts
+
+    def count(self, length: int, position: int, letter: str) -> int:
+        counts = self.support.get((length, position))
+        return counts[ord(letter) - 65] if counts else 0
+
+    def share(self, length: int, position: int, letter: str) -> float:
+        total = self.totals.get(length)
+        return self.count(length, position, letter) / total if total else 0.0
+
+    def weight(self, word: str, crossings: Sequence[tuple[int, int, int]]) -> float:
+        # Geometric mean, over (position, other length, other position) crossings, of the
+        # share of the crossing slot's words that agree with `word`'s letter there.
+        if not crossings:
+            return 1.0
+        product = 1.0
+        for position, other_length, other_position in crossings:
+            product *= self.share(other_length, other_position, word[position])
+        return product ** (1 / len(crossings))
+
+
+def weighted_order(items: list[T], weights: Sequence[float], rng: random.Random) -> list[T]:
+    # Weighted shuffle: sorting by log(u) / weight draws items without replacement with
+    # probability proportional to weight. Zero-weight items go last.
+    keys = [
+        math.log(1.0 - rng.random()) / weight if weight > 0 else -math.inf for weight in weights
+    ]
+    order = sorted(range(len(items)), key=keys.__getitem__, reverse=True)
+    return [items[position] for position in order]
+
+
+def crossing_tables(word_index) -> CrossingTables:
+    tables = _CROSSING_TABLES.get(word_index)
+    if tables is None:
+        tables = CrossingTables(word_index.by_length)
+        _CROSSING_TABLES[word_index] = tables
+    return tables
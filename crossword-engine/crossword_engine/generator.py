@@ -2,12 +2,19 @@ from __future__ import annotations
 
 import random
 import time
+from collections import deque
 from dataclasses import dataclass
-from itertools import combinations
-from typing import Iterable
-
-from .grid import Slot, build_solution_grid, extract_slots, validate_black_cells, validate_no_singletons
-from .wordlist import WordIndex
+from typing import AbstractSet, Callable, Iterable, Iterator
+
+from .catalog import enumerate_black_sets
+from .crossings import crossing_tables, weighted_order
+from .grid import Slot, build_solution_grid
+from .hashing import ShapeKey, canonical_shape
+from .search import DomainSearch, SearchLimits, SolveStats, SolverTimeout
+from .templates import SlotTemplate, get_template
+from .trie_fill import PrefixFill
+from .vectorized import MatrixWordIndex
+from .wordlist import BitsetWordIndex, WordIndex
 
 GRID_SIZES = [
     (5, 5),
@@ -19,8 +26,22 @@ GRID_SIZES = [
 ]
 
 
-class SolverTimeout(Exception):
-    pass
+SOLVER_STRATEGIES = ["domains", "pattern", "trie"]
+PROPAGATION_MODES = ["forward", "ac3"]
+# How the solver treats answers passed in avoid_words (e.g. overused across the bank).
+AVOID_POLICIES = ["reject", "demote"]
+VALUE_ORDERS = ["random", "lcv"]
+
+
+@dataclass
+class SolverConfig:
+    strategy: str = "domains"
+    propagation: str = "forward"
+    backjump: bool = False
+    node_limit: int | None = None
+    restart_base: int = 0
+    avoid_policy: str = "reject"
+    value_order: str = "random"
 
 
 @dataclass
@@ -34,6 +55,31 @@ class Puzzle:
     hash_hex: str
 
 
+class RecentShapes:
+    # Shapes equal up to mirroring, rotation or transposition fill the same way,
+    # so a shape equivalent to one tried in the last `size` attempts is skipped.
+    def __init__(self, size: int):
+        self.size = size
+        self._order: deque[ShapeKey] = deque()
+        self._keys: set[ShapeKey] = set()
+
+    def __contains__(self, key: ShapeKey) -> bool:
+        return key in self._keys
+
+    def add(self, key: ShapeKey) -> None:
+        if key in self._keys or self.size <= 0:
+            return
+        self._order.append(key)
+        self._keys.add(key)
+        if len(self._order) > self.size:
+            self._keys.discard(self._order.popleft())
+
+
+SHAPE_REDRAWS = 8
+# Solves allowed per requested fill before generate_fills gives up on a shape.
+FILL_ATTEMPTS = 2
+
+
 _BLACK_SET_CACHE: dict[tuple[int, int], list[list[tuple[int, int]]]] = {}
 
 
@@ -51,26 +97,28 @@ def valid_black_sets(width: int, height: int) -> list[list[tuple[int, int]]]:
     if cache_key in _BLACK_SET_CACHE:
         return _BLACK_SET_CACHE[cache_key]
 
-    border = border_cells(width, height)
-    valid: list[list[tuple[int, int]]] = []
-    for count in range(0, 5):
-        for combo in combinations(border, count):
-            if not validate_black_cells(width, height, combo):
-                continue
-            if not validate_no_singletons(width, height, combo):
-                continue
-            valid.append(list(combo))
-
+    valid = enumerate_black_sets(width, height)
     _BLACK_SET_CACHE[cache_key] = valid
     return valid
 
 
-def pattern_for_slot(slot: Slot, grid_letters: dict[tuple[int, int], str]) -> str:
-    letters: list[str] = []
-    for cell in slot.cells:
-        letter = grid_letters.get(cell)
-        letters.append(letter if letter else ".")
-    return "".join(letters)
+def install_black_set_catalog(catalog: dict[tuple[int, int], list[list[tuple[int, int]]]]) -> None:
+    _BLACK_SET_CACHE.update(catalog)
+
+
+def precompute_templates(sizes: Iterable[tuple[int, int]] = GRID_SIZES) -> int:
+    count = 0
+    for width, height in sizes:
+        for black_cells in valid_black_sets(width, height):
+            get_template(width, height, black_cells)
+            count += 1
+    return count
+
+
+def matches_pattern(word: str, pattern: str) -> bool:
+    if len(word) != len(pattern):
+        return False
+    return all(ch == "." or ch == letter for ch, letter in zip(pattern, word))
 
 
 def intersects_map(cell_to_slots: dict[tuple[int, int], list[tuple[int, int]]]) -> dict[int, set[int]]:
@@ -88,106 +136,301 @@ def solve_grid(
     width: int,
     height: int,
     black_cells: Iterable[tuple[int, int]],
-    word_index: WordIndex,
+    word_index: WordIndex | BitsetWordIndex | MatrixWordIndex,
     rng: random.Random,
     time_limit_s: float,
     forced_word: str | None = None,
+    config: SolverConfig | None = None,
+    stats: SolveStats | None = None,
+    avoid_words: AbstractSet[str] | None = None,
 ) -> tuple[dict[tuple[int, int], str], list[Slot]] | None:
-    slots, cell_to_slots = extract_slots(width, height, black_cells)
-    if not slots:
+    config = config or SolverConfig()
+    if avoid_words and forced_word in avoid_words:
+        avoid_words = avoid_words - {forced_word}
+    stats = stats if stats is not None else SolveStats()
+    template = get_template(width, height, black_cells)
+    if not template.slots:
         return None
 
-    slot_by_id = {slot.slot_id: slot for slot in slots}
-    neighbors = intersects_map(cell_to_slots)
-    grid_letters: dict[tuple[int, int], str] = {}
+    limits = SearchLimits(stats, time_limit_s, config.node_limit, config.restart_base)
+    hits, misses = cache_counters(word_index)
+    stats.outcome = "timeout"
+    start = time.perf_counter()
+    try:
+        if config.strategy == "domains" and isinstance(word_index, BitsetWordIndex):
+            solved = solve_with_domains(
+                template, word_index, rng, limits, forced_word, config, avoid_words
+            )
+        elif config.strategy == "trie":
+            solved = solve_with_prefixes(
+                template, word_index, rng, limits, forced_word, config, avoid_words
+            )
+        else:
+            solved = solve_with_patterns(
+                template, word_index, rng, limits, forced_word, config, avoid_words
+            )
+        stats.outcome = "solved" if solved else "unsat"
+        return solved
+    finally:
+        stats.elapsed_s += time.perf_counter() - start
+        end_hits, end_misses = cache_counters(word_index)
+        stats.cache_hits += end_hits - hits
+        stats.cache_misses += end_misses - misses
+
+
+def cache_counters(word_index: WordIndex | BitsetWordIndex | MatrixWordIndex) -> tuple[int, int]:
+    hits = misses = 0
+    for name in ("cache", "count_cache"):
+        cache = getattr(word_index, name, None)
+        if cache is not None:
+            hits += cache.hits
+            misses += cache.misses
+    return hits, misses
+
+
+def solve_with_patterns(
+    template: SlotTemplate,
+    word_index: WordIndex | BitsetWordIndex | MatrixWordIndex,
+    rng: random.Random,
+    limits: SearchLimits,
+    forced_word: str | None,
+    config: SolverConfig,
+    avoid_words: AbstractSet[str] | None = None,
+) -> tuple[dict[tuple[int, int], str], list[Slot]] | None:
+    slots = template.slots
+    stats = limits.stats
+    avoid_words = avoid_words or set()
+    reject_avoided = config.avoid_policy == "reject"
+    ordered_slots = [slots[slot_id] for slot_id in template.order]
+    crossings = template.crossings
+    tables = crossing_tables(word_index)
+    lengths = [len(slot.cells) for slot in slots]
+    spans = template.spans
+    offset_slots = template.offset_slots
+    # Letters by row-major offset ("." when open); each slot is one strided slice.
+    grid = bytearray(b"." * (template.width * template.height))
     assigned: dict[int, str] = {}
     used_words: set[str] = set()
-    deadline = time.monotonic() + time_limit_s
+    # Number of filled cells per slot, kept in step with the grid.
+    filled = [0] * len(slots)
+    batch_count = getattr(word_index, "count_batch", None)
+
+    def slot_pattern(slot_id: int) -> str:
+        start, stop, step = spans[slot_id]
+        return grid[start:stop:step].decode("ascii")
 
     def forward_check(slot_id: int) -> bool:
-        for neighbor_id in neighbors.get(slot_id, set()):
+        word = assigned[slot_id]
+        for neighbor_id, position, neighbor_position in crossings.get(slot_id, []):
             if neighbor_id in assigned:
                 continue
-            neighbor = slot_by_id[neighbor_id]
-            pattern = pattern_for_slot(neighbor, grid_letters)
-            candidates = word_index.candidates(pattern)
-            if not any(word not in used_words for word in candidates):
+            support = tables.count(lengths[neighbor_id], neighbor_position, word[position])
+            if not support:
+                stats.forward_check_failures += 1
+                return False
+            # Only the crossing letter is set: every supporting word fits, and more of
+            # them than there are used words means at least one is still free.
+            if filled[neighbor_id] == 1 and support > len(used_words):
+                continue
+            if not word_index.has_candidate(slot_pattern(neighbor_id), used_words):
+                stats.forward_check_failures += 1
                 return False
         return True
 
+    def least_constraining(slot_id: int, pattern: str, candidates: list[str]) -> list[str]:
+        # Only crossings through still-empty cells tell candidates apart.
+        open_crossings = [
+            (position, lengths[other_id], other_position)
+            for other_id, position, other_position in crossings.get(slot_id, [])
+            if other_id not in assigned and pattern[position] == "."
+        ]
+        weights = [tables.weight(word, open_crossings) for word in candidates]
+        return weighted_order(candidates, weights, rng)
+
     def backtrack() -> bool:
-        if time.monotonic() > deadline:
-            raise SolverTimeout()
+        limits.tick()
         if len(assigned) == len(slots):
             return True
 
-        best_slot: Slot | None = None
-        best_candidates: list[str] | None = None
-        for slot in slots:
-            if slot.slot_id in assigned:
-                continue
-            pattern = pattern_for_slot(slot, grid_letters)
-            candidates = [
-                word for word in word_index.candidates(pattern) if word not in used_words
-            ]
-            if not candidates:
+        # Rank open slots by candidate count; only the winner's words are materialized.
+        open_slots = [slot for slot in ordered_slots if slot.slot_id not in assigned]
+        patterns = [slot_pattern(slot.slot_id) for slot in open_slots]
+        if batch_count is not None:
+            counts = batch_count(patterns)
+        else:
+            counts = [word_index.count(pattern) for pattern in patterns]
+
+        best_position = -1
+        best_count = 0
+        for position, (pattern, count) in enumerate(zip(patterns, counts)):
+            count -= sum(1 for word in used_words if matches_pattern(word, pattern))
+            if count <= 0:
                 return False
-            if best_candidates is None or len(candidates) < len(best_candidates):
-                best_slot = slot
-                best_candidates = candidates
-                if len(best_candidates) == 1:
+            if best_position < 0 or count < best_count:
+                best_position = position
+                best_count = count
+                if count == 1:
                     break
 
-        if not best_slot or best_candidates is None:
+        best_slot = open_slots[best_position]
+        best_pattern = patterns[best_position]
+        best_candidates = [
+            word for word in word_index.candidates(best_pattern) if word not in used_words
+        ]
+        if avoid_words and reject_avoided:
+            best_candidates = [word for word in best_candidates if word not in avoid_words]
+        if not best_candidates:
             return False
-
-        rng.shuffle(best_candidates)
-        for word in best_candidates:
-            added: dict[tuple[int, int], str] = {}
-            for cell, letter in zip(best_slot.cells, word):
-                existing = grid_letters.get(cell)
-                if existing and existing != letter:
-                    break
-                if not existing:
-                    added[cell] = letter
-            else:
-                grid_letters.update(added)
-                assigned[best_slot.slot_id] = word
-                used_words.add(word)
-
-                if forward_check(best_slot.slot_id) and backtrack():
-                    return True
-
-                used_words.remove(word)
-                del assigned[best_slot.slot_id]
-                for cell in added:
-                    del grid_letters[cell]
-
+        return try_candidates(best_slot.slot_id, best_pattern, best_candidates)
+
+    def try_candidates(slot_id: int, pattern: str, candidates: list[str]) -> bool:
+        if config.value_order == "lcv":
+            candidates = least_constraining(slot_id, pattern, candidates)
+        else:
+            rng.shuffle(candidates)
+        if avoid_words and not reject_avoided:
+            candidates.sort(key=avoid_words.__contains__)
+
+        # Every candidate matches the pattern, so placing one writes the whole slice and
+        # undoing it writes the pattern back; only the open cells change fill counts.
+        start, stop, step = spans[slot_id]
+        touched = [
+            other_id
+            for offset, letter in zip(range(start, stop, step), pattern)
+            if letter == "."
+            for other_id in offset_slots[offset]
+        ]
+        saved = pattern.encode("ascii")
+        for word in candidates:
+            grid[start:stop:step] = word.encode("ascii")
+            for other_id in touched:
+                filled[other_id] += 1
+            assigned[slot_id] = word
+            used_words.add(word)
+
+            if forward_check(slot_id) and backtrack():
+                return True
+
+            used_words.remove(word)
+            del assigned[slot_id]
+            for other_id in touched:
+                filled[other_id] -= 1
+            grid[start:stop:step] = saved
+
+        stats.backtracks += 1
         return False
 
-    def try_forced_slot(slot: Slot) -> bool:
-        grid_letters.clear()
+    def attempt(forced_slot: Slot | None) -> bool:
+        grid[:] = b"." * len(grid)
         assigned.clear()
         used_words.clear()
-        for cell, letter in zip(slot.cells, forced_word or ""):
-            grid_letters[cell] = letter
-        assigned[slot.slot_id] = forced_word or ""
-        used_words.add(forced_word or "")
+        filled[:] = [0] * len(slots)
+        if forced_slot is not None:
+            start, stop, step = spans[forced_slot.slot_id]
+            grid[start:stop:step] = (forced_word or "").encode("ascii")
+            for offset in range(start, stop, step):
+                for other_id in offset_slots[offset]:
+                    filled[other_id] += 1
+            assigned[forced_slot.slot_id] = forced_word or ""
+            used_words.add(forced_word or "")
         return backtrack()
 
+    def grid_letters() -> dict[tuple[int, int], str]:
+        width = template.width
+        return {
+            cell: chr(grid[cell[0] * width + cell[1]])
+            for slot in slots
+            for cell in slot.cells
+        }
+
     if forced_word:
         candidates = [slot for slot in slots if len(slot.cells) == len(forced_word)]
         rng.shuffle(candidates)
         for slot in candidates:
-            if try_forced_slot(slot):
-                return grid_letters, slots
+            if limits.run(lambda: attempt(slot)):
+                return grid_letters(), slots
         return None
 
-    if backtrack():
-        return grid_letters, slots
+    if limits.run(lambda: attempt(None)):
+        return grid_letters(), slots
     return None
 
 
+def solve_with_domains(
+    template: SlotTemplate,
+    word_index: BitsetWordIndex,
+    rng: random.Random,
+    limits: SearchLimits,
+    forced_word: str | None,
+    config: SolverConfig,
+    avoid_words: AbstractSet[str] | None = None,
+) -> tuple[dict[tuple[int, int], str], list[Slot]] | None:
+    slots = template.slots
+    avoid: dict[int, int] = {}
+    for word in avoid_words or ():
+        avoid[len(word)] = avoid.get(len(word), 0) | word_index.word_bit(word)
+    search = DomainSearch(
+        slots,
+        template.crossings,
+        word_index,
+        rng,
+        limits,
+        propagation=config.propagation,
+        order=template.order,
+        backjump=config.backjump,
+        avoid=avoid,
+        avoid_policy=config.avoid_policy,
+        value_order=config.value_order,
+    )
+
+    answers: dict[int, str] | None = None
+    if forced_word:
+        candidates = [slot for slot in slots if len(slot.cells) == len(forced_word)]
+        rng.shuffle(candidates)
+        for slot in candidates:
+            answers = search.solve(forced=(slot.slot_id, forced_word))
+            if answers:
+                break
+    else:
+        answers = search.solve()
+
+    if not answers:
+        return None
+    grid_letters: dict[tuple[int, int], str] = {}
+    for slot in slots:
+        for cell, letter in zip(slot.cells, answers[slot.slot_id]):
+            grid_letters[cell] = letter
+    return grid_letters, slots
+
+
+def solve_with_prefixes(
+    template: SlotTemplate,
+    word_index: WordIndex | BitsetWordIndex | MatrixWordIndex,
+    rng: random.Random,
+    limits: SearchLimits,
+    forced_word: str | None,
+    config: SolverConfig,
+    avoid_words: AbstractSet[str] | None = None,
+) -> tuple[dict[tuple[int, int], str], list[Slot]] | None:
+    slots = template.slots
+    fill = PrefixFill(template, word_index, rng, limits, avoid_words, config.avoid_policy)
+
+    grid_letters: dict[tuple[int, int], str] | None = None
+    if forced_word:
+        candidates = [slot for slot in slots if len(slot.cells) == len(forced_word)]
+        rng.shuffle(candidates)
+        for slot in candidates:
+            grid_letters = fill.solve(forced=(slot, forced_word))
+            if grid_letters:
+                break
+    else:
+        grid_letters = fill.solve()
+
+    if not grid_letters:
+        return None
+    return grid_letters, slots
+
+
 def build_entries(slots: list[Slot], answers: dict[int, str]) -> dict[str, list[dict]]:
     entries: dict[str, list[dict]] = {"across": [], "down": []}
     for slot in slots:
@@ -208,26 +451,47 @@ def build_entries(slots: list[Slot], answers: dict[int, str]) -> dict[str, list[
     return entries
 
 
-def generate_puzzle(
-    word_index: WordIndex,
-    rng: random.Random,
-    time_limit_s: float,
-    hash_func,
-    id_func,
-    forced_word: str | None = None,
-) -> Puzzle | None:
+def pick_shape(
+    rng: random.Random, recent_shapes: RecentShapes | None = None
+) -> tuple[int, int, list[tuple[int, int]]] | None:
     width, height = rng.choice(GRID_SIZES)
     candidates = valid_black_sets(width, height)
     if not candidates:
         return None
     black_cells = rng.choice(candidates)
+    if recent_shapes is not None:
+        shape = canonical_shape(width, height, black_cells)
+        for _ in range(SHAPE_REDRAWS):
+            if shape not in recent_shapes:
+                break
+            black_cells = rng.choice(candidates)
+            shape = canonical_shape(width, height, black_cells)
+        recent_shapes.add(shape)
+    return width, height, black_cells
+
+
+def describe_shape(
+    stats: SolveStats | None,
+    width: int,
+    height: int,
+    black_cells: list[tuple[int, int]],
+    forced_word: str | None,
+) -> None:
+    if stats is not None:
+        stats.width = width
+        stats.height = height
+        stats.black_cells = list(black_cells)
+        stats.forced_word = forced_word
 
-    solved = solve_grid(
-        width, height, black_cells, word_index, rng, time_limit_s, forced_word=forced_word
-    )
-    if not solved:
-        return None
 
+def build_puzzle(
+    width: int,
+    height: int,
+    black_cells: list[tuple[int, int]],
+    solved: tuple[dict[tuple[int, int], str], list[Slot]],
+    hash_func,
+    id_func,
+) -> Puzzle:
     grid_letters, slots = solved
     grid_solution = build_solution_grid(width, height, black_cells, grid_letters)
 
@@ -250,3 +514,111 @@ def generate_puzzle(
         puzzle_id=puzzle_id,
         hash_hex=hash_hex,
     )
+
+
+def puzzle_answers(puzzle: Puzzle) -> set[str]:
+    return {entry["answer"] for entries in puzzle.entries.values() for entry in entries}
+
+
+def generate_puzzle(
+    word_index: WordIndex | BitsetWordIndex | MatrixWordIndex,
+    rng: random.Random,
+    time_limit_s: float,
+    hash_func,
+    id_func,
+    forced_word: str | None = None,
+    config: SolverConfig | None = None,
+    stats: SolveStats | None = None,
+    recent_shapes: RecentShapes | None = None,
+    avoid_words: AbstractSet[str] | None = None,
+) -> Puzzle | None:
+    shape = pick_shape(rng, recent_shapes)
+    if shape is None:
+        return None
+    width, height, black_cells = shape
+    describe_shape(stats, width, height, black_cells, forced_word)
+
+    solved = solve_grid(
+        width,
+        height,
+        black_cells,
+        word_index,
+        rng,
+        time_limit_s,
+        forced_word=forced_word,
+        config=config,
+        stats=stats,
+        avoid_words=avoid_words,
+    )
+    if not solved:
+        return None
+    return build_puzzle(width, height, black_cells, solved, hash_func, id_func)
+
+
+def generate_fills(
+    word_index: WordIndex | BitsetWordIndex | MatrixWordIndex,
+    rng: random.Random,
+    time_limit_s: float,
+    hash_func,
+    id_func,
+    fills: int,
+    max_shared: int = 0,
+    forced_word: str | None = None,
+    config: SolverConfig | None = None,
+    record_stats: Callable[[SolveStats, Puzzle | None], None] | None = None,
+    recent_shapes: RecentShapes | None = None,
+    avoid_words: AbstractSet[str] | None = None,
+) -> Iterator[Puzzle]:
+    # Yields up to `fills` puzzles on one shape, reusing its template and the warm
+    # pattern caches. A fill sharing more than `max_shared` answers with an earlier
+    # one is dropped. Earlier fills' answers are passed on as avoid_words only when
+    # that cannot undercut the cap: always with max_shared == 0, and as a soft
+    # preference under the demote policy; rejecting them outright would refuse every
+    # shared answer. Only the first fill carries the forced word. The shape is
+    # abandoned at the first solve that fails or times out.
+    shape = pick_shape(rng, recent_shapes)
+    if shape is None:
+        return
+    width, height, black_cells = shape
+    earlier: list[set[str]] = []
+    used: set[str] = set()
+    avoid_used = max_shared == 0 or (config is not None and config.avoid_policy == "demote")
+    for _ in range(fills * FILL_ATTEMPTS):
+        if len(earlier) >= fills:
+            return
+        fill_forced = forced_word if not earlier else None
+        fill_avoid = avoid_words
+        if avoid_used and used:
+            fill_avoid = used | avoid_words if avoid_words else used
+        stats = SolveStats()
+        describe_shape(stats, width, height, black_cells, fill_forced)
+        try:
+            solved = solve_grid(
+                width,
+                height,
+                black_cells,
+                word_index,
+                rng,
+                time_limit_s,
+                forced_word=fill_forced,
+                config=config,
+                stats=stats,
+                avoid_words=fill_avoid,
+            )
+        except SolverTimeout:
+            solved = None
+        puzzle = build_puzzle(width, height, black_cells, solved, hash_func, id_func) if solved else None
+        if puzzle is not None:
+            answers = puzzle_answers(puzzle)
+            if any(len(answers & previous) > max_shared for previous in earlier):
+                stats.outcome = "overlap"
+                puzzle = None
+        if record_stats is not None:
+            record_stats(stats, puzzle)
+        if puzzle is None:
+            if not solved:
+                return
+            continue
+        earlier.append(answers)
+        used |= answers
+        yield puzzle
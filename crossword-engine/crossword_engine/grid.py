@@ -9,7 +9,7 @@ class Slot:
     slot_id: int
     direction: str
     number: int
-    cells: list[tuple[int, int]]
+    cells: tuple[tuple[int, int], ...]
 
 
 def is_border_cell(row: int, col: int, width: int, height: int) -> bool:
@@ -128,7 +128,9 @@ def extract_slots(
                 while c < width and (row, c) not in black_set:
                     cells.append((row, c))
                     c += 1
-                slots.append(Slot(slot_id=slot_id, direction="across", number=number, cells=cells))
+                slots.append(
+                    Slot(slot_id=slot_id, direction="across", number=number, cells=tuple(cells))
+                )
                 slot_id += 1
 
             if starts_down:
@@ -137,7 +139,9 @@ def extract_slots(
                 while r < height and (r, col) not in black_set:
                     cells.append((r, col))
                     r += 1
-                slots.append(Slot(slot_id=slot_id, direction="down", number=number, cells=cells))
+                slots.append(
+                    Slot(slot_id=slot_id, direction="down", number=number, cells=tuple(cells))
+                )
                 slot_id += 1
 
     for slot in slots:
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import hashlib
-from typing import Iterable
+from typing import Iterable, Tuple
 
 
 def canonical_bytes(
@@ -36,3 +36,56 @@ def puzzle_hash(
 ) -> str:
     digest = hashlib.sha256(canonical_bytes(width, height, black_cells, grid_solution)).hexdigest()
     return digest
+
+
+def transpose_solution(
+    width: int,
+    height: int,
+    black_cells: Iterable[tuple[int, int]],
+    grid_solution: list[list[str | None]],
+) -> tuple[int, int, list[tuple[int, int]], list[list[str | None]]]:
+    transposed = [[grid_solution[row][col] for row in range(height)] for col in range(width)]
+    return height, width, [(c, r) for r, c in black_cells], transposed
+
+
+def canonical_puzzle_hash(
+    width: int,
+    height: int,
+    black_cells: Iterable[tuple[int, int]],
+    grid_solution: list[list[str | None]],
+) -> str:
+    # Transposing swaps across and down but keeps every answer. Mirrors and rotations
+    # reverse words, so they produce genuinely different puzzles and are not folded in.
+    black_cells = list(black_cells)
+    forms = [
+        canonical_bytes(width, height, black_cells, grid_solution),
+        canonical_bytes(*transpose_solution(width, height, black_cells, grid_solution)),
+    ]
+    return hashlib.sha256(min(forms)).hexdigest()
+
+
+ShapeKey = Tuple[int, int, Tuple[Tuple[int, int], ...]]
+
+
+def shape_variants(width: int, height: int, black_cells: Iterable[tuple[int, int]]) -> list[ShapeKey]:
+    cells = [tuple(cell) for cell in black_cells]
+    last_row = height - 1
+    last_col = width - 1
+    transforms = [
+        (width, height, lambda r, c: (r, c)),
+        (width, height, lambda r, c: (r, last_col - c)),
+        (width, height, lambda r, c: (last_row - r, c)),
+        (width, height, lambda r, c: (last_row - r, last_col - c)),
+        (height, width, lambda r, c: (c, r)),
+        (height, width, lambda r, c: (last_col - c, last_row - r)),
+        (height, width, lambda r, c: (c, last_row - r)),
+        (height, width, lambda r, c: (last_col - c, r)),
+    ]
+    return [
+        (new_width, new_height, tuple(sorted(move(r, c) for r, c in cells)))
+        for new_width, new_height, move in transforms
+    ]
+
+
+def canonical_shape(width: int, height: int, black_cells: Iterable[tuple[int, int]]) -> ShapeKey:
+    return min(shape_variants(width, height, black_cells))
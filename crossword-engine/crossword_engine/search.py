@@ -0,0 +1,406 @@
+from __future__ import annotations
+
+import random
+import time
+from dataclasses import dataclass, field
+from operator import itemgetter
+from typing import Callable, Dict, List, Tuple, TypeVar
+
+from .crossings import weighted_order
+from .grid import Slot
+from .wordlist import BitsetWordIndex, popcount
+
+
+class SolverTimeout(Exception):
+    pass
+
+
+class RestartSearch(Exception):
+    pass
+
+
+@dataclass
+class SolveStats:
+    nodes: int = 0
+    backtracks: int = 0
+    backjumps: int = 0
+    restarts: int = 0
+    forward_check_failures: int = 0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    elapsed_s: float = 0.0
+    # "solved", "unsat" or "timeout"; empty until a solve finishes. generate_fills
+    # marks a solved fill it drops for sharing too many answers as "overlap".
+    outcome: str = ""
+    width: int = 0
+    height: int = 0
+    black_cells: list[tuple[int, int]] = field(default_factory=list)
+    forced_word: str | None = None
+
+
+T = TypeVar("T")
+
+
+def luby(index: int) -> int:
+    power = 1
+    while (1 << power) - 1 < index:
+        power += 1
+    if index == (1 << power) - 1:
+        return 1 << (power - 1)
+    return luby(index - (1 << (power - 1)) + 1)
+
+
+class SearchLimits:
+    def __init__(
+        self,
+        stats: SolveStats,
+        time_limit_s: float,
+        node_limit: int | None = None,
+        restart_base: int = 0,
+    ):
+        self.stats = stats
+        # A node limit replaces the wall-clock deadline so seeded runs are reproducible.
+        self.deadline = None if node_limit else time.monotonic() + time_limit_s
+        self.node_limit = node_limit
+        self.restart_base = restart_base
+        self.run_budget = 0
+        self.run_nodes = 0
+
+    def tick(self) -> None:
+        self.stats.nodes += 1
+        if self.node_limit and self.stats.nodes > self.node_limit:
+            raise SolverTimeout()
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise SolverTimeout()
+        if self.run_budget:
+            self.run_nodes += 1
+            if self.run_nodes > self.run_budget:
+                raise RestartSearch()
+
+    def run(self, attempt: Callable[[], T]) -> T:
+        run_index = 0
+        while True:
+            run_index += 1
+            self.run_budget = luby(run_index) * self.restart_base
+            self.run_nodes = 0
+            try:
+                return attempt()
+            except RestartSearch:
+                self.stats.restarts += 1
+
+
+Crossings = Dict[int, List[Tuple[int, int, int]]]
+
+
+def crossing_map(cell_to_slots: dict[tuple[int, int], list[tuple[int, int]]]) -> Crossings:
+    crossings: Crossings = {}
+    for slot_entries in cell_to_slots.values():
+        for slot_id, position in slot_entries:
+            crossings.setdefault(slot_id, [])
+            for other_id, other_position in slot_entries:
+                if other_id != slot_id:
+                    crossings[slot_id].append((other_id, position, other_position))
+    return crossings
+
+
+class DomainSearch:
+    def __init__(
+        self,
+        slots: list[Slot],
+        crossings: Crossings,
+        word_index: BitsetWordIndex,
+        rng: random.Random,
+        limits: SearchLimits,
+        propagation: str = "forward",
+        order: list[int] | None = None,
+        backjump: bool = False,
+        avoid: dict[int, int] | None = None,
+        avoid_policy: str = "reject",
+        value_order: str = "random",
+    ):
+        self.slots = slots
+        self.order = order if order is not None else [slot.slot_id for slot in slots]
+        self.lengths = [len(slot.cells) for slot in slots]
+        self.crossings = [crossings.get(slot.slot_id, []) for slot in slots]
+        self.word_index = word_index
+        self.rng = rng
+        self.limits = limits
+        self.stats = limits.stats
+        self.propagation = propagation
+        self.backjump = backjump
+        # Word bits per length to keep out of the domains ("reject") or try last ("demote").
+        self.avoid = avoid or {}
+        self.avoid_policy = avoid_policy
+        self.value_order = value_order
+        self.letter_tables: dict[tuple[int, int], list[tuple[int, int]]] = {}
+        if propagation == "ac3":
+            for length in set(self.lengths):
+                for position in range(length):
+                    self.letter_tables[length, position] = [
+                        (1 << (ord(letter) - 65), mask)
+                        for letter, mask in word_index.position_masks(length, position).items()
+                    ]
+        self.reset()
+
+    def reset(self) -> None:
+        self.domains = [self.word_index.length_mask(length) for length in self.lengths]
+        if self.avoid and self.avoid_policy == "reject":
+            self.domains = [
+                domain & ~self.avoid.get(length, 0)
+                for domain, length in zip(self.domains, self.lengths)
+            ]
+        self.assigned: list[str | None] = [None] * len(self.slots)
+        self.used: dict[int, int] = {length: 0 for length in self.lengths}
+        self.trail: list[tuple[int, int]] = []
+        self.remaining = len(self.slots)
+        self._support_cache: dict[tuple[int, int], tuple[int, int]] = {}
+        # Assigned slots whose choices narrowed each slot's domain (backjumping only).
+        self.pruned_by: list[set[int]] = [set() for _ in self.slots]
+        self.wiped_out = -1
+
+    def assign(self, slot_id: int, word: str, bit: int) -> bool:
+        length = self.lengths[slot_id]
+        self.assigned[slot_id] = word
+        self.used[length] |= bit
+        self.remaining -= 1
+
+        domains = self.domains
+        letter_mask = self.word_index.letter_mask
+        changed: list[int] = []
+        for other_id, position, other_position in self.crossings[slot_id]:
+            if self.assigned[other_id] is not None:
+                continue
+            other_length = self.lengths[other_id]
+            narrowed = domains[other_id] & letter_mask(other_length, other_position, word[position])
+            if narrowed != domains[other_id]:
+                self.trail.append((other_id, domains[other_id]))
+                domains[other_id] = narrowed
+                changed.append(other_id)
+                if self.backjump:
+                    self.add_culprits(other_id, {slot_id})
+            if not narrowed & ~self.used[other_length]:
+                self.wiped_out = other_id
+                self.stats.forward_check_failures += 1
+                return False
+
+        if self.propagation == "ac3" and changed:
+            return self.propagate(changed)
+        return True
+
+    def letter_support(self, slot_id: int, position: int) -> int:
+        live = self.domains[slot_id] & ~self.used[self.lengths[slot_id]]
+        key = (slot_id, position)
+        cached = self._support_cache.get(key)
+        if cached is not None and cached[0] == live:
+            return cached[1]
+        letters = 0
+        for letter_bit, mask in self.letter_tables[self.lengths[slot_id], position]:
+            if live & mask:
+                letters |= letter_bit
+        self._support_cache[key] = (live, letters)
+        return letters
+
+    def revise(self, slot_id: int, position: int, other_id: int, other_position: int) -> int:
+        own = self.letter_support(slot_id, position)
+        allowed_letters = own & self.letter_support(other_id, other_position)
+        if allowed_letters == own:
+            return self.domains[slot_id]
+        allowed = 0
+        for letter_bit, mask in self.letter_tables[self.lengths[slot_id], position]:
+            if allowed_letters & letter_bit:
+                allowed |= mask
+        return self.domains[slot_id] & allowed
+
+    def propagate(self, queue: list[int]) -> bool:
+        domains = self.domains
+        pending = set(queue)
+        while queue:
+            changed_id = queue.pop()
+            pending.discard(changed_id)
+            for slot_id, other_position, position in self.crossings[changed_id]:
+                if self.assigned[slot_id] is not None:
+                    continue
+                revised = self.revise(slot_id, position, changed_id, other_position)
+                if revised == domains[slot_id]:
+                    continue
+                self.trail.append((slot_id, domains[slot_id]))
+                domains[slot_id] = revised
+                if self.backjump:
+                    self.add_culprits(slot_id, self.pruned_by[changed_id])
+                if not revised & ~self.used[self.lengths[slot_id]]:
+                    self.wiped_out = slot_id
+                    return False
+                if slot_id not in pending:
+                    pending.add(slot_id)
+                    queue.append(slot_id)
+        return True
+
+    def add_culprits(self, slot_id: int, culprits: set[int]) -> None:
+        added = culprits - self.pruned_by[slot_id]
+        if added:
+            self.pruned_by[slot_id] |= added
+            self.trail.append((~slot_id, added))
+
+    def conflict_set(self, slot_id: int) -> set[int]:
+        conflict = set(self.pruned_by[slot_id])
+        length = self.lengths[slot_id]
+        if self.domains[slot_id] & self.used[length]:
+            conflict.update(
+                other_id
+                for other_id, word in enumerate(self.assigned)
+                if word is not None and self.lengths[other_id] == length
+            )
+        return conflict
+
+    def unassign(self, slot_id: int, bit: int, mark: int) -> None:
+        trail = self.trail
+        domains = self.domains
+        while len(trail) > mark:
+            other_id, previous = trail.pop()
+            if other_id < 0:
+                self.pruned_by[~other_id] -= previous
+            else:
+                domains[other_id] = previous
+        self.used[self.lengths[slot_id]] &= ~bit
+        self.assigned[slot_id] = None
+        self.remaining += 1
+
+    def select_slot(self) -> tuple[int, int] | None:
+        best_id = -1
+        best_live = 0
+        best_count = 0
+        for slot_id in self.order:
+            if self.assigned[slot_id] is not None:
+                continue
+            live = self.domains[slot_id] & ~self.used[self.lengths[slot_id]]
+            count = popcount(live)
+            if count == 0:
+                self.wiped_out = slot_id
+                return None
+            if best_id < 0 or count < best_count:
+                best_id, best_live, best_count = slot_id, live, count
+                if count == 1:
+                    break
+        return best_id, best_live
+
+    def ordered_values(self, slot_id: int, live: int) -> list[int]:
+        length = self.lengths[slot_id]
+        bits: list[int] = []
+        while live:
+            low = live & -live
+            bits.append(low)
+            live ^= low
+        if self.value_order == "lcv":
+            bits = self.least_constraining(slot_id, bits)
+        else:
+            self.rng.shuffle(bits)
+        demoted = self.avoid.get(length, 0) if self.avoid_policy == "demote" else 0
+        if demoted:
+            bits.sort(key=lambda bit: bool(bit & demoted))
+        return bits
+
+    def least_constraining(self, slot_id: int, bits: list[int]) -> list[int]:
+        # Weights each word by how much of every open crossing slot's live domain keeps
+        # its letter there (geometric mean), then shuffles by weight so fills still vary.
+        positions: list[int] = []
+        crossings: list[tuple[int, int, int]] = []
+        for other_id, position, other_position in self.crossings[slot_id]:
+            if self.assigned[other_id] is None:
+                other_length = self.lengths[other_id]
+                live = self.domains[other_id] & ~self.used[other_length]
+                crossings.append((other_length, other_position, live))
+                positions.append(position)
+        if len(bits) < 2 or not crossings:
+            self.rng.shuffle(bits)
+            return bits
+
+        bucket = self.word_index.by_length[self.lengths[slot_id]]
+        letter_mask = self.word_index.letter_mask
+        crossing_letters = itemgetter(*positions)
+        exponent = 1 / len(crossings)
+        # Words with the same letters at the crossings share a weight.
+        by_letters: dict[str | tuple[str, ...], float] = {}
+        weights: list[float] = []
+        for bit in bits:
+            key = crossing_letters(bucket[bit.bit_length() - 1])
+            weight = by_letters.get(key)
+            if weight is None:
+                letters = key if isinstance(key, tuple) else (key,)
+                product = 1.0
+                for letter, (other_length, other_position, live) in zip(letters, crossings):
+                    supported = live & letter_mask(other_length, other_position, letter)
+                    product *= popcount(supported) / (popcount(live) or 1)
+                weight = by_letters[key] = product**exponent
+            weights.append(weight)
+        return weighted_order(bits, weights, self.rng)
+
+    def search(self) -> bool:
+        self.limits.tick()
+        if self.remaining == 0:
+            return True
+
+        choice = self.select_slot()
+        if choice is None:
+            return False
+        slot_id, live = choice
+
+        bucket = self.word_index.by_length[self.lengths[slot_id]]
+        for bit in self.ordered_values(slot_id, live):
+            mark = len(self.trail)
+            word = bucket[bit.bit_length() - 1]
+            if self.assign(slot_id, word, bit) and self.search():
+                return True
+            self.unassign(slot_id, bit, mark)
+
+        self.stats.backtracks += 1
+        return False
+
+    def search_backjumping(self) -> set[int] | None:
+        self.limits.tick()
+        if self.remaining == 0:
+            return None
+
+        choice = self.select_slot()
+        if choice is None:
+            return self.conflict_set(self.wiped_out)
+        slot_id, live = choice
+
+        conflict = self.conflict_set(slot_id)
+        bucket = self.word_index.by_length[self.lengths[slot_id]]
+        for bit in self.ordered_values(slot_id, live):
+            mark = len(self.trail)
+            word = bucket[bit.bit_length() - 1]
+            if self.assign(slot_id, word, bit):
+                result = self.search_backjumping()
+                if result is None:
+                    return None
+                if slot_id not in result:
+                    self.unassign(slot_id, bit, mark)
+                    self.stats.backjumps += 1
+                    return result
+                conflict |= result
+            else:
+                conflict |= self.conflict_set(self.wiped_out)
+            conflict.discard(slot_id)
+            self.unassign(slot_id, bit, mark)
+
+        self.stats.backtracks += 1
+        return conflict
+
+    def solve(self, forced: tuple[int, str] | None = None) -> dict[int, str] | None:
+        return self.limits.run(lambda: self.solve_once(forced))
+
+    def solve_once(self, forced: tuple[int, str] | None) -> dict[int, str] | None:
+        self.reset()
+        if self.propagation == "ac3" and not self.propagate(list(range(len(self.slots)))):
+            return None
+        if forced:
+            slot_id, word = forced
+            if not self.assign(slot_id, word, self.word_index.word_bit(word)):
+                return None
+        if self.backjump:
+            if self.search_backjumping() is not None:
+                return None
+        elif not self.search():
+            return None
+        return {slot_id: word for slot_id, word in enumerate(self.assigned) if word is not None}
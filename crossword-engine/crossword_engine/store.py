@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+from pathlib import Path
+from typing import Callable, Iterator
+
+from .hashing import puzzle_hash
+
+STORE_SCHEMA_VERSION = 2
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS puzzles (
+        seq INTEGER PRIMARY KEY,
+        hash TEXT NOT NULL UNIQUE,
+        puzzle_id TEXT NOT NULL,
+        width INTEGER NOT NULL,
+        height INTEGER NOT NULL,
+        payload TEXT NOT NULL
+    )
+    """,
+    # Hashes of puzzles generated earlier but not stored here (e.g. read from a bank's
+    # _hashes.txt after the files moved on to Puzzles_FINISHED or the app). add()
+    # refuses them like stored puzzles.
+    "CREATE TABLE IF NOT EXISTS seen_hashes (hash TEXT PRIMARY KEY)",
+]
+
+
+# Puzzles, hashes and sequence numbers in one SQLite file. Duplicate checks and
+# inserts go through the unique hash index, so neither startup nor a write has
+# to scan the existing bank.
+def next_index(output_dir: Path) -> int:
+    max_index = 0
+    for path in output_dir.glob("puzzle_*.json"):
+        stem = path.stem
+        parts = stem.split("_")
+        if len(parts) != 2:
+            continue
+        try:
+            index = int(parts[1])
+        except ValueError:
+            continue
+        max_index = max(max_index, index)
+    return max_index + 1
+
+
+class PuzzleStore:
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version not in (0, 1, STORE_SCHEMA_VERSION):
+            raise ValueError(f"Unsupported puzzle store version {version}: {path}")
+        for statement in SCHEMA:
+            self.conn.execute(statement)
+        self.conn.execute(f"PRAGMA user_version={STORE_SCHEMA_VERSION}")
+        self.conn.commit()
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM puzzles").fetchone()[0]
+
+    def __contains__(self, hash_hex: str) -> bool:
+        row = self.conn.execute(
+            "SELECT 1 FROM puzzles WHERE hash = ? UNION ALL SELECT 1 FROM seen_hashes WHERE hash = ?",
+            (hash_hex, hash_hex),
+        ).fetchone()
+        return row is not None
+
+    def hash_count(self) -> int:
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM (SELECT hash FROM puzzles UNION SELECT hash FROM seen_hashes)"
+        ).fetchone()[0]
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def add(self, hash_hex: str, payload: dict, seq: int | None = None) -> int | None:
+        seen = self.conn.execute("SELECT 1 FROM seen_hashes WHERE hash = ?", (hash_hex,)).fetchone()
+        if seen is not None:
+            return None
+        cursor = self.conn.execute(
+            "INSERT OR IGNORE INTO puzzles (seq, hash, puzzle_id, width, height, payload) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                seq,
+                hash_hex,
+                payload["id"],
+                payload["width"],
+                payload["height"],
+                json.dumps(payload, separators=(",", ":")),
+            ),
+        )
+        self.conn.commit()
+        if not cursor.rowcount:
+            return None
+        return cursor.lastrowid
+
+    def iter_puzzles(self, start_seq: int = 1) -> Iterator[tuple[int, str, dict]]:
+        rows = self.conn.execute(
+            "SELECT seq, hash, payload FROM puzzles WHERE seq >= ? ORDER BY seq", (start_seq,)
+        )
+        for seq, hash_hex, payload in rows:
+            yield seq, hash_hex, json.loads(payload)
+
+    def export_json(
+        self,
+        output_dir: Path,
+        start_seq: int = 1,
+        first_index: int | None = None,
+        overwrite: bool = False,
+    ) -> int:
+        # Puzzles already in the bank's hash log are skipped; the rest get new file
+        # numbers after the bank's highest puzzle_NNNNNN.json, so the files and the
+        # log stay in step.
+        output_dir.mkdir(parents=True, exist_ok=True)
+        hash_path = output_dir / "_hashes.txt"
+        known_hashes: set[str] = set()
+        if hash_path.exists():
+            known_hashes = {line.strip() for line in hash_path.read_text().splitlines() if line.strip()}
+        index = next_index(output_dir) if first_index is None else first_index
+
+        written = 0
+        with hash_path.open("a", encoding="utf-8") as hashes:
+            for _, hash_hex, payload in self.iter_puzzles(start_seq):
+                if hash_hex in known_hashes:
+                    continue
+                path = output_dir / f"puzzle_{index:06d}.json"
+                if path.exists() and not overwrite:
+                    raise FileExistsError(f"{path} already exists; pass overwrite to replace it")
+                path.write_text(json.dumps(payload, indent=2))
+                hashes.write(f"{hash_hex}\n")
+                hashes.flush()
+                known_hashes.add(hash_hex)
+                index += 1
+                written += 1
+        return written
+
+    def import_hashes(self, hash_path: Path) -> int:
+        # Records every hash in a _hashes.txt log so those puzzles are never added again.
+        if not hash_path.exists():
+            return 0
+        hashes = {line.strip() for line in hash_path.read_text().splitlines() if line.strip()}
+        before = self.conn.total_changes
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO seen_hashes (hash) "
+            "SELECT ? WHERE NOT EXISTS (SELECT 1 FROM puzzles WHERE hash = ?)",
+            ((hash_hex, hash_hex) for hash_hex in sorted(hashes)),
+        )
+        self.conn.commit()
+        return self.conn.total_changes - before
+
+    def import_json(self, input_dir: Path, hash_func: Callable[..., str] = puzzle_hash) -> int:
+        # Files keep their number as the sequence where free, so exports round-trip.
+        imported = 0
+        for path in sorted(input_dir.glob("puzzle_*.json")):
+            try:
+                seq = int(path.stem.split("_")[1])
+            except (IndexError, ValueError):
+                continue
+            payload = json.loads(path.read_text())
+            black_cells = [(r, c) for r, c in payload.get("blackCells", [])]
+            hash_hex = hash_func(
+                payload["width"], payload["height"], black_cells, payload["gridSolution"]
+            )
+            stored = self.conn.execute(
+                "SELECT 1 FROM puzzles WHERE hash = ?", (hash_hex,)
+            ).fetchone()
+            if stored is not None:
+                continue
+            # The file is the puzzle a seen hash stands for; store it in full.
+            self.conn.execute("DELETE FROM seen_hashes WHERE hash = ?", (hash_hex,))
+            # A taken sequence number means another bank was imported first; append instead.
+            if self.add(hash_hex, payload, seq=seq) is None:
+                self.add(hash_hex, payload)
+            imported += 1
+        return imported
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Tuple
+
+from .grid import Slot, extract_slots
+from .search import Crossings, crossing_map
+
+TEMPLATE_FORMAT_VERSION = 1
+
+TemplateKey = Tuple[int, int, Tuple[Tuple[int, int], ...]]
+
+
+@dataclass(frozen=True)
+class SlotTemplate:
+    width: int
+    height: int
+    black_cells: tuple[tuple[int, int], ...]
+    slots: list[Slot]
+    cell_to_slots: dict[tuple[int, int], list[tuple[int, int]]]
+    crossings: Crossings
+    neighbors: dict[int, set[int]]
+    order: list[int]
+    # Flat row-major layout: grid[start:stop:step] is a slot's letters, and
+    # offset_slots[row * width + col] the ids of the slots through that cell.
+    spans: list[tuple[int, int, int]]
+    offset_slots: list[tuple[int, ...]]
+
+
+_TEMPLATE_CACHE: dict[TemplateKey, SlotTemplate] = {}
+
+
+def template_key(width: int, height: int, black_cells: Iterable[tuple[int, int]]) -> TemplateKey:
+    return width, height, tuple(sorted((r, c) for r, c in black_cells))
+
+
+def build_template(width: int, height: int, black_cells: Iterable[tuple[int, int]]) -> SlotTemplate:
+    _, _, black = template_key(width, height, black_cells)
+    slots, _ = extract_slots(width, height, black)
+    return template_from_slots(width, height, black, slots)
+
+
+def template_from_slots(
+    width: int, height: int, black_cells: tuple[tuple[int, int], ...], slots: list[Slot]
+) -> SlotTemplate:
+    cell_to_slots: dict[tuple[int, int], list[tuple[int, int]]] = {}
+    for slot in slots:
+        for index, cell in enumerate(slot.cells):
+            cell_to_slots.setdefault(cell, []).append((slot.slot_id, index))
+
+    crossings = crossing_map(cell_to_slots)
+    neighbors = {
+        slot_id: {other_id for other_id, _, _ in entries} for slot_id, entries in crossings.items()
+    }
+    # Most constrained first: slots with many crossings, then longer slots.
+    order = sorted(
+        (slot.slot_id for slot in slots),
+        key=lambda slot_id: (-len(crossings.get(slot_id, [])), -len(slots[slot_id].cells), slot_id),
+    )
+    spans: list[tuple[int, int, int]] = []
+    for slot in slots:
+        (row, col), (end_row, end_col) = slot.cells[0], slot.cells[-1]
+        step = 1 if slot.direction == "across" else width
+        spans.append((row * width + col, end_row * width + end_col + step, step))
+    offset_slots = [
+        tuple(slot_id for slot_id, _ in cell_to_slots.get((row, col), ()))
+        for row in range(height)
+        for col in range(width)
+    ]
+    return SlotTemplate(
+        width=width,
+        height=height,
+        black_cells=black_cells,
+        slots=slots,
+        cell_to_slots=cell_to_slots,
+        crossings=crossings,
+        neighbors=neighbors,
+        order=order,
+        spans=spans,
+        offset_slots=offset_slots,
+    )
+
+
+def get_template(width: int, height: int, black_cells: Iterable[tuple[int, int]]) -> SlotTemplate:
+    key = template_key(width, height, black_cells)
+    template = _TEMPLATE_CACHE.get(key)
+    if template is None:
+        template = build_template(*key)
+        _TEMPLATE_CACHE[key] = template
+    return template
+
+
+def cached_template_count() -> int:
+    return len(_TEMPLATE_CACHE)
+
+
+def save_templates(path: Path) -> None:
+    payload = {
+        "version": TEMPLATE_FORMAT_VERSION,
+        "templates": [
+            {
+                "width": template.width,
+                "height": template.height,
+                "blackCells": [[r, c] for r, c in template.black_cells],
+                "slots": [
+                    {
+                        "id": slot.slot_id,
+                        "direction": slot.direction,
+                        "number": slot.number,
+                        "cells": [[r, c] for r, c in slot.cells],
+                    }
+                    for slot in template.slots
+                ],
+            }
+            for template in _TEMPLATE_CACHE.values()
+        ],
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(json.dumps(payload, separators=(",", ":")))
+    os.replace(tmp_path, path)
+
+
+def load_templates(path: Path) -> int:
+    if not path.exists():
+        return 0
+    try:
+        payload = json.loads(path.read_text())
+    except json.JSONDecodeError:
+        return 0
+    if not isinstance(payload, dict) or payload.get("version") != TEMPLATE_FORMAT_VERSION:
+        return 0
+
+    loaded = 0
+    for entry in payload.get("templates", []):
+        black = tuple(sorted((r, c) for r, c in entry["blackCells"]))
+        slots = [
+            Slot(
+                slot_id=item["id"],
+                direction=item["direction"],
+                number=item["number"],
+                cells=tuple((r, c) for r, c in item["cells"]),
+            )
+            for item in entry["slots"]
+        ]
+        key = (entry["width"], entry["height"], black)
+        _TEMPLATE_CACHE[key] = template_from_slots(entry["width"], entry["height"], black, slots)
+        loaded += 1
+    return loaded
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import random
+import weakref
+from typing import AbstractSet, Dict
+
+from .grid import Slot
+from .search import SearchLimits
+from .templates import SlotTemplate
+
+LETTERS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+# For each word length: prefix -> 26-bit set of letters that can follow it.
+PrefixTables = Dict[int, Dict[str, int]]
+
+_PREFIX_TABLES: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def build_prefix_tables(by_length: dict[int, list[str]]) -> PrefixTables:
+    tables: PrefixTables = {}
+    for length, words in by_length.items():
+        table: dict[str, int] = {}
+        for word in words:
+            for pos in range(length):
+                prefix = word[:pos]
+                table[prefix] = table.get(prefix, 0) | (1 << (ord(word[pos]) - 65))
+        tables[length] = table
+    return tables
+
+
+def prefix_tables(word_index) -> PrefixTables:
+    tables = _PREFIX_TABLES.get(word_index)
+    if tables is None:
+        tables = build_prefix_tables(word_index.by_length)
+        _PREFIX_TABLES[word_index] = tables
+    return tables
+
+
+class PrefixFill:
+    # Fills open cells in row-major order, so every across and down slot grows one
+    # letter at a time from its start. A cell may only take letters that extend both
+    # of its slots' prefixes, which rejects dead prefixes as soon as they appear.
+    def __init__(
+        self,
+        template: SlotTemplate,
+        word_index,
+        rng: random.Random,
+        limits: SearchLimits,
+        avoid_words: AbstractSet[str] | None = None,
+        avoid_policy: str = "reject",
+    ):
+        self.slots = template.slots
+        self.tables = prefix_tables(word_index)
+        self.rng = rng
+        self.limits = limits
+        self.stats = limits.stats
+        self.avoid_words = avoid_words or set()
+        self.avoid_policy = avoid_policy
+
+        self.cells = sorted(template.cell_to_slots)
+        # Per cell: (slot id, slot length, completes the slot?) for each slot through it.
+        lengths = [len(slot.cells) for slot in self.slots]
+        self.cell_slots: list[list[tuple[int, int, bool]]] = [
+            [
+                (slot_id, lengths[slot_id], position == lengths[slot_id] - 1)
+                for slot_id, position in template.cell_to_slots[cell]
+            ]
+            for cell in self.cells
+        ]
+        self.prefixes = [""] * len(self.slots)
+        self.fixed: dict[tuple[int, int], str] = {}
+        self.forced_slot = -1
+        self.used: set[str] = set()
+
+    def place_forced(self, slot: Slot, word: str) -> None:
+        # The word joins `used` when its slot completes, like any other answer. It need
+        # not be in the wordlist, so its own slot skips the prefix tables.
+        self.fixed = dict(zip(slot.cells, word))
+        self.forced_slot = slot.slot_id
+
+    def allowed_letters(self, index: int) -> int:
+        fixed = self.fixed.get(self.cells[index])
+        allowed = (1 << 26) - 1 if fixed is None else 1 << (ord(fixed) - 65)
+        for slot_id, length, _ in self.cell_slots[index]:
+            if slot_id == self.forced_slot:
+                continue
+            allowed &= self.tables.get(length, {}).get(self.prefixes[slot_id], 0)
+            if not allowed:
+                return 0
+        return allowed
+
+    def ordered_letters(self, index: int, allowed: int) -> list[str]:
+        letters = [LETTERS[bit] for bit in range(26) if allowed >> bit & 1]
+        self.rng.shuffle(letters)
+        if self.avoid_words and self.avoid_policy == "demote":
+            completing = [slot_id for slot_id, _, last in self.cell_slots[index] if last]
+            if completing:
+                letters.sort(
+                    key=lambda letter: any(
+                        self.prefixes[slot_id] + letter in self.avoid_words for slot_id in completing
+                    )
+                )
+        return letters
+
+    def fill(self, index: int) -> bool:
+        self.limits.tick()
+        if index == len(self.cells):
+            return True
+
+        allowed = self.allowed_letters(index)
+        if not allowed:
+            self.stats.backtracks += 1
+            return False
+
+        entries = self.cell_slots[index]
+        reject_avoided = self.avoid_policy == "reject"
+        for letter in self.ordered_letters(index, allowed):
+            completed: list[str] = []
+            for slot_id, _, last in entries:
+                self.prefixes[slot_id] += letter
+                if last:
+                    completed.append(self.prefixes[slot_id])
+
+            duplicate = len(completed) == 2 and completed[0] == completed[1]
+            blocked = duplicate or any(
+                word in self.used or (reject_avoided and word in self.avoid_words)
+                for word in completed
+            )
+            if not blocked:
+                self.used.update(completed)
+                if self.fill(index + 1):
+                    return True
+                self.used.difference_update(completed)
+
+            for slot_id, _, _ in entries:
+                self.prefixes[slot_id] = self.prefixes[slot_id][:-1]
+
+        self.stats.backtracks += 1
+        return False
+
+    def solve(self, forced: tuple[Slot, str] | None = None) -> dict[tuple[int, int], str] | None:
+        def attempt() -> bool:
+            self.prefixes = [""] * len(self.slots)
+            self.fixed = {}
+            self.forced_slot = -1
+            self.used = set()
+            if forced is not None:
+                self.place_forced(*forced)
+            return self.fill(0)
+
+        if not self.limits.run(attempt):
+            return None
+        grid_letters: dict[tuple[int, int], str] = {}
+        for slot_id, slot in enumerate(self.slots):
+            for cell, letter in zip(slot.cells, self.prefixes[slot_id]):
+                grid_letters[cell] = letter
+        return grid_letters
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+from typing import Sequence
+
+from .wordlist import DEFAULT_CACHE_SIZE, BitsetWordIndex, PatternCache
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; the bitset index covers the default path.
+    np = None
+
+
+def numpy_available() -> bool:
+    return np is not None
+
+
+class MatrixWordIndex(BitsetWordIndex):
+    def __init__(self, words: list[str], cache_size: int = DEFAULT_CACHE_SIZE):
+        if np is None:
+            raise RuntimeError("MatrixWordIndex requires numpy (pip install numpy)")
+        super().__init__(words, cache_size=cache_size)
+        self.count_cache = PatternCache(cache_size)
+        self._matrices: dict[int, "np.ndarray"] = {}
+        # Row masks per (length, position, letter), the numpy form of the bitset masks.
+        self._columns: dict[int, list[dict[str, "np.ndarray"]]] = {}
+        for length, bucket in self.by_length.items():
+            encoded = "".join(bucket).encode("ascii")
+            matrix = np.frombuffer(encoded, dtype=np.uint8).reshape(len(bucket), length)
+            self._matrices[length] = matrix
+            self._columns[length] = [
+                {chr(code): matrix[:, pos] == code for code in np.unique(matrix[:, pos]).tolist()}
+                for pos in range(length)
+            ]
+
+    def _encode_patterns(self, patterns: Sequence[str], length: int) -> "np.ndarray":
+        encoded = "".join(patterns).encode("ascii")
+        array = np.frombuffer(encoded, dtype=np.uint8).reshape(len(patterns), length).copy()
+        array[array == ord(".")] = 0
+        return array
+
+    def _grouped_matches(self, patterns: Sequence[str]):
+        by_length: dict[int, list[int]] = {}
+        for position, pattern in enumerate(patterns):
+            by_length.setdefault(len(pattern), []).append(position)
+
+        for length, positions in by_length.items():
+            matrix = self._matrices.get(length)
+            if matrix is None:
+                yield positions, np.zeros((len(positions), 0), dtype=bool)
+                continue
+            encoded = self._encode_patterns([patterns[p] for p in positions], length)
+            wildcard = encoded == 0
+            matches = (matrix[None, :, :] == encoded[:, None, :]) | wildcard[:, None, :]
+            yield positions, matches.all(axis=2)
+
+    def match_batch(self, patterns: Sequence[str]) -> list["np.ndarray"]:
+        results: list["np.ndarray"] = [None] * len(patterns)  # type: ignore[list-item]
+        for positions, rows in self._grouped_matches(patterns):
+            for row, position in zip(rows, positions):
+                results[position] = row
+        return results
+
+    def count_batch(self, patterns: Sequence[str]) -> list[int]:
+        # A search re-counts the same few patterns at almost every node, so counts are
+        # cached; a miss ANDs the row masks of its fixed letters instead of comparing
+        # the whole bucket matrix against the pattern.
+        results = [0] * len(patterns)
+        for position, pattern in enumerate(patterns):
+            count = self.count_cache.get(pattern)
+            if count is None:
+                count = self._count(pattern)
+                self.count_cache.put(pattern, count)
+            results[position] = count
+        return results
+
+    def _count(self, pattern: str) -> int:
+        columns = self._columns.get(len(pattern))
+        if columns is None:
+            return 0
+        rows = None
+        for pos, ch in enumerate(pattern):
+            if ch == ".":
+                continue
+            column = columns[pos].get(ch)
+            if column is None:
+                return 0
+            rows = column if rows is None else rows & column
+        if rows is None:
+            return len(self.by_length[len(pattern)])
+        return int(np.count_nonzero(rows))
+
+    def words_for_match(self, length: int, match: "np.ndarray") -> list[str]:
+        bucket = self.by_length.get(length, [])
+        return [bucket[idx] for idx in np.flatnonzero(match)]
@@ -1,11 +1,20 @@
 from __future__ import annotations
 
 import re
+from collections import OrderedDict
 from dataclasses import dataclass
 from pathlib import Path
 
 WORD_RE = re.compile(r"^[A-Z]+$")
 CATEGORIES = ["core", "names", "geo", "slang", "abbreviations"]
+DEFAULT_CACHE_SIZE = 100_000
+
+try:
+    popcount = int.bit_count
+except AttributeError:  # int.bit_count is Python 3.10+.
+
+    def popcount(value: int) -> int:
+        return bin(value).count("1")
 
 
 def normalize_word(raw: str) -> str | None:
@@ -44,15 +53,59 @@ class WordData:
     by_length: dict[int, list[str]]
 
 
+class PatternCache:
+    def __init__(self, max_size: int = DEFAULT_CACHE_SIZE):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[str, list[str] | int] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, pattern: str) -> list[str] | int | None:
+        words = self._entries.get(pattern)
+        if words is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(pattern)
+        return words
+
+    def put(self, pattern: str, words: list[str] | int) -> None:
+        self._entries[pattern] = words
+        self._entries.move_to_end(pattern)
+        if self.max_size > 0:
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict[str, int | float]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
 class WordIndex:
-    def __init__(self, words: list[str]):
+    def __init__(self, words: list[str], cache_size: int = DEFAULT_CACHE_SIZE):
         self.words = words
         self.by_length: dict[int, list[str]] = {}
         for word in words:
             self.by_length.setdefault(len(word), []).append(word)
 
         self._index: dict[int, list[dict[str, set[int]]]] = {}
-        self._cache: dict[int, dict[str, list[str]]] = {}
+        self.cache = PatternCache(cache_size)
+        self.count_cache = PatternCache(cache_size)
         self._all_indices: dict[int, set[int]] = {}
         self._build_index()
 
@@ -63,17 +116,10 @@ class WordIndex:
                 for pos, ch in enumerate(word):
                     positions[pos].setdefault(ch, set()).add(idx)
             self._index[length] = positions
-            self._cache[length] = {}
             self._all_indices[length] = set(range(len(words)))
 
-    def candidates(self, pattern: str) -> list[str]:
+    def _indices(self, pattern: str) -> set[int]:
         length = len(pattern)
-        if length not in self.by_length:
-            return []
-        cache = self._cache[length]
-        if pattern in cache:
-            return cache[pattern]
-
         indices = set(self._all_indices[length])
         positions = self._index[length]
         for pos, ch in enumerate(pattern):
@@ -82,9 +128,133 @@ class WordIndex:
             indices &= positions[pos].get(ch, set())
             if not indices:
                 break
+        return indices
+
+    def candidates(self, pattern: str) -> list[str]:
+        length = len(pattern)
+        if length not in self.by_length:
+            return []
+        cached = self.cache.get(pattern)
+        if cached is not None:
+            return cached
+
+        words = [self.by_length[length][idx] for idx in self._indices(pattern)]
+        self.cache.put(pattern, words)
+        return words
+
+    def count(self, pattern: str) -> int:
+        if len(pattern) not in self.by_length:
+            return 0
+        cached = self.count_cache.get(pattern)
+        if cached is not None:
+            return cached
+
+        count = len(self._indices(pattern))
+        self.count_cache.put(pattern, count)
+        return count
+
+    def has_candidate(self, pattern: str, exclude: set[str]) -> bool:
+        count = self.count(pattern)
+        if count > len(exclude):
+            return True
+        if not count:
+            return False
+        return any(word not in exclude for word in self.candidates(pattern))
+
+
+class BitsetWordIndex:
+    def __init__(self, words: list[str], cache_size: int = DEFAULT_CACHE_SIZE):
+        self.words = words
+        self.by_length: dict[int, list[str]] = {}
+        for word in words:
+            self.by_length.setdefault(len(word), []).append(word)
+
+        self._masks: dict[int, list[dict[str, int]]] = {}
+        self._full_masks: dict[int, int] = {}
+        self._word_bits: dict[str, int] | None = None
+        self.cache = PatternCache(cache_size)
+        self._build_index()
+
+    # Invariant relied on by every by_length consumer: by_length[length] holds exactly
+    # the live words of that length, and bit i of its masks is by_length[length][i].
+    def _build_index(self) -> None:
+        for length in self.by_length:
+            self._build_bucket(length)
+
+    def _build_bucket(self, length: int) -> None:
+        words = self.by_length[length]
+        positions: list[dict[str, int]] = [dict() for _ in range(length)]
+        for idx, word in enumerate(words):
+            bit = 1 << idx
+            for pos, ch in enumerate(word):
+                positions[pos][ch] = positions[pos].get(ch, 0) | bit
+        self._masks[length] = positions
+        self._full_masks[length] = (1 << len(words)) - 1
+
+    def length_mask(self, length: int) -> int:
+        return self._full_masks.get(length, 0)
+
+    def letter_mask(self, length: int, position: int, letter: str) -> int:
+        return self._masks[length][position].get(letter, 0)
+
+    def position_masks(self, length: int, position: int) -> dict[str, int]:
+        return self._masks[length][position]
+
+    def mask(self, pattern: str) -> int:
+        length = len(pattern)
+        mask = self._full_masks.get(length, 0)
+        if not mask:
+            return 0
+        positions = self._masks[length]
+        for pos, ch in enumerate(pattern):
+            if ch == ".":
+                continue
+            mask &= positions[pos].get(ch, 0)
+            if not mask:
+                break
+        return mask
+
+    def count(self, pattern: str) -> int:
+        return popcount(self.mask(pattern))
+
+    def word_bit(self, word: str) -> int:
+        if self._word_bits is None:
+            self._word_bits = {
+                bucket_word: 1 << idx
+                for bucket in self.by_length.values()
+                for idx, bucket_word in enumerate(bucket)
+            }
+        return self._word_bits.get(word, 0)
+
+    def has_candidate(self, pattern: str, exclude: set[str]) -> bool:
+        mask = self.mask(pattern)
+        if not mask:
+            return False
+        length = len(pattern)
+        for word in exclude:
+            if len(word) == length:
+                mask &= ~self.word_bit(word)
+        return bool(mask)
+
+    def words_for_mask(self, length: int, mask: int) -> list[str]:
+        bucket = self.by_length.get(length, [])
+        words: list[str] = []
+        while mask:
+            low = mask & -mask
+            words.append(bucket[low.bit_length() - 1])
+            mask ^= low
+        return words
+
+    def candidates(self, pattern: str) -> list[str]:
+        length = len(pattern)
+        if length not in self.by_length:
+            return []
+        cached = self.cache.get(pattern)
+        if cached is not None:
+            return cached
 
-        words = [self.by_length[length][idx] for idx in indices]
-        cache[pattern] = words
+        words = self.words_for_mask(length, self.mask(pattern))
+        self.cache.put(pattern, words)
         return words
 
 
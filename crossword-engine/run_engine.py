@@ -4,12 +4,43 @@ from __future__ import annotations
 import argparse
 import json
 import random
+import signal
 import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import asdict
 from pathlib import Path
 
-from crossword_engine.generator import SolverTimeout, generate_puzzle
-from crossword_engine.hashing import puzzle_hash
-from crossword_engine.wordlist import WordIndex, load_words, normalize_word
+from crossword_engine.answers import AnswerIndex, load_or_build
+from crossword_engine.catalog import build_catalog, load_catalog, save_catalog
+from crossword_engine.compiled import load_or_compile
+from crossword_engine.generator import (
+    AVOID_POLICIES,
+    PROPAGATION_MODES,
+    SOLVER_STRATEGIES,
+    Puzzle,
+    RecentShapes,
+    SolverConfig,
+    GRID_SIZES,
+    VALUE_ORDERS,
+    generate_fills,
+    install_black_set_catalog,
+    precompute_templates,
+)
+from crossword_engine.hashing import canonical_puzzle_hash, puzzle_hash
+from crossword_engine.search import SolveStats
+from crossword_engine.store import PuzzleStore, next_index
+from crossword_engine.templates import load_templates, save_templates
+from crossword_engine.vectorized import MatrixWordIndex, numpy_available
+from crossword_engine.wordlist import (
+    DEFAULT_CACHE_SIZE,
+    BitsetWordIndex,
+    WordIndex,
+    load_words,
+    normalize_word,
+)
+
+
+HASH_FUNCS = {"literal": puzzle_hash, "canonical": canonical_puzzle_hash}
 
 
 def puzzle_id_from_hash(hash_hex: str) -> str:
@@ -41,19 +72,360 @@ def append_hash(hash_path: Path, hash_hex: str) -> None:
         handle.write(f"{hash_hex}\n")
 
 
-def next_index(output_dir: Path) -> int:
-    max_index = 0
-    for path in output_dir.glob("puzzle_*.json"):
-        stem = path.stem
-        parts = stem.split("_")
-        if len(parts) != 2:
-            continue
-        try:
-            index = int(parts[1])
-        except ValueError:
-            continue
-        max_index = max(max_index, index)
-    return max_index + 1
+def build_word_index(
+    index_kind: str, wordlists_dir: Path, compiled_index: Path | None, cache_size: int
+):
+    if index_kind == "bitset" and compiled_index is not None:
+        return load_or_compile(wordlists_dir, compiled_index, 2, 7, cache_size=cache_size)
+
+    if index_kind == "numpy" and not numpy_available():
+        raise SystemExit("--index numpy requires numpy to be installed")
+    word_data = load_words(wordlists_dir, min_len=2, max_len=7)
+    index_classes = {"bitset": BitsetWordIndex, "set": WordIndex, "numpy": MatrixWordIndex}
+    return index_classes[index_kind](word_data.words, cache_size=cache_size)
+
+
+def prepare_black_set_catalog(catalog_path: Path | None) -> None:
+    if catalog_path is None:
+        return
+    catalog = load_catalog(catalog_path)
+    if catalog is None or any(size not in catalog for size in GRID_SIZES):
+        catalog = build_catalog(GRID_SIZES)
+        save_catalog(catalog_path, catalog)
+    install_black_set_catalog(catalog)
+
+
+def prepare_templates(template_cache: Path | None) -> int:
+    # Opt-in only: rebuilding a template from its slots costs about as much as
+    # building it from scratch (~0.2 ms), so preloading all 960 (~0.2-0.3 s, again
+    # in every worker) is slower than building the few dozen a run actually uses.
+    if template_cache is None:
+        return 0
+    loaded = load_templates(template_cache)
+    if not loaded:
+        loaded = precompute_templates()
+        save_templates(template_cache)
+    return loaded
+
+
+def print_cache_stats(word_index) -> None:
+    stats = word_index.cache.stats()
+    print(
+        f"Pattern cache: {stats['size']}/{stats['max_size'] or 'unbounded'} entries, "
+        f"{stats['hits']} hits, {stats['misses']} misses, {stats['evictions']} evictions "
+        f"({stats['hit_rate']:.1%} hit rate)"
+    )
+
+
+def puzzle_to_json(puzzle: Puzzle) -> dict:
+    grid_preview = [
+        "".join("-" if cell is None else cell for cell in row)
+        for row in puzzle.grid_solution
+    ]
+    return {
+        "gridPreview": grid_preview,
+        "id": puzzle.puzzle_id,
+        "date": "",
+        "width": puzzle.width,
+        "height": puzzle.height,
+        "blackCells": [[r, c] for r, c in puzzle.black_cells],
+        "gridSolution": puzzle.grid_solution,
+        "entries": puzzle.entries,
+    }
+
+
+class BankWriter:
+    def __init__(self, output_dir: Path):
+        self.output_dir = output_dir
+        self.hash_path = output_dir / "_hashes.txt"
+        self.existing_hashes = load_existing_hashes(self.hash_path)
+        self.index = next_index(output_dir)
+
+    def __len__(self) -> int:
+        return len(self.existing_hashes)
+
+    def write(self, puzzle: Puzzle) -> str | None:
+        if puzzle.hash_hex in self.existing_hashes:
+            return None
+
+        output_path = self.output_dir / f"puzzle_{self.index:06d}.json"
+        output_path.write_text(json.dumps(puzzle_to_json(puzzle), indent=2))
+        append_hash(self.hash_path, puzzle.hash_hex)
+        self.existing_hashes.add(puzzle.hash_hex)
+        self.index += 1
+        return output_path.name
+
+    def close(self) -> None:
+        pass
+
+
+class StoreWriter:
+    def __init__(self, store_path: Path, hash_path: Path | None = None):
+        self.store = PuzzleStore(store_path)
+        # The JSON bank's hash log also covers puzzles that have since moved on; the
+        # store must refuse those too.
+        if hash_path is not None:
+            self.store.import_hashes(hash_path)
+
+    def __len__(self) -> int:
+        return self.store.hash_count()
+
+    def write(self, puzzle: Puzzle) -> str | None:
+        seq = self.store.add(puzzle.hash_hex, puzzle_to_json(puzzle))
+        if seq is None:
+            return None
+        # Store entries only get file names when exported, so name them by seq.
+        return f"{self.store.path.name}#{seq}"
+
+    def close(self) -> None:
+        self.store.close()
+
+
+class StatsLog:
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.handle = path.open("a", encoding="utf-8")
+
+    def write(self, record: dict) -> None:
+        self.handle.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self.handle.flush()
+
+    def close(self) -> None:
+        self.handle.close()
+
+
+def stats_record(stats: SolveStats, puzzle: Puzzle | None) -> dict:
+    record = asdict(stats)
+    record["black_cells"] = [[r, c] for r, c in stats.black_cells]
+    record["puzzle_id"] = puzzle.puzzle_id if puzzle else None
+    record["timestamp"] = round(time.time(), 3)
+    return record
+
+
+class AnswerTracker:
+    def __init__(self, index: AnswerIndex | None, max_uses: int):
+        self.index = index
+        self.max_uses = max_uses
+        self.avoid: set[str] = set()
+        if index is not None and max_uses:
+            self.avoid = index.overused(max_uses)
+
+    def record(self, puzzle: Puzzle) -> None:
+        if self.index is None:
+            return
+        answers = [entry["answer"] for entries in puzzle.entries.values() for entry in entries]
+        self.index.add_puzzle(puzzle.puzzle_id, answers)
+        if self.max_uses:
+            self.avoid.update(answer for answer in answers if self.index.usage(answer) >= self.max_uses)
+
+
+_WORKER_INDEX = None
+_WORKER_RECENT_SHAPES: RecentShapes | None = None
+
+
+def init_worker(
+    index_kind: str,
+    wordlists_dir: Path,
+    compiled_index: Path | None,
+    cache_size: int,
+    template_cache: Path | None,
+    black_set_catalog: Path | None,
+    recent_shapes: int,
+) -> None:
+    global _WORKER_INDEX, _WORKER_RECENT_SHAPES
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _WORKER_RECENT_SHAPES = RecentShapes(recent_shapes) if recent_shapes else None
+    prepare_black_set_catalog(black_set_catalog)
+    prepare_templates(template_cache)
+    _WORKER_INDEX = build_word_index(index_kind, wordlists_dir, compiled_index, cache_size)
+
+
+def solver_config_from_args(args) -> SolverConfig:
+    return SolverConfig(
+        strategy=args.strategy,
+        propagation=args.propagation,
+        backjump=args.backjump,
+        node_limit=args.node_limit,
+        restart_base=args.restart_base,
+        avoid_policy=args.avoid_policy,
+        value_order=args.value_order,
+    )
+
+
+def generate_in_worker(
+    seed: int,
+    time_limit_s: float,
+    forced_word: str | None,
+    config: SolverConfig,
+    hash_mode: str = "literal",
+    collect_stats: bool = False,
+    avoid_words: frozenset[str] = frozenset(),
+    fills: int = 1,
+    max_shared: int = 0,
+) -> tuple[list[Puzzle], list[dict]]:
+    rng = random.Random(seed)
+    records: list[dict] = []
+
+    def record_stats(stats: SolveStats, puzzle: Puzzle | None) -> None:
+        if collect_stats:
+            records.append(stats_record(stats, puzzle))
+
+    while True:
+        puzzles = list(
+            generate_fills(
+                word_index=_WORKER_INDEX,
+                rng=rng,
+                time_limit_s=time_limit_s,
+                hash_func=HASH_FUNCS[hash_mode],
+                id_func=puzzle_id_from_hash,
+                fills=fills,
+                max_shared=max_shared,
+                forced_word=forced_word,
+                config=config,
+                record_stats=record_stats,
+                recent_shapes=_WORKER_RECENT_SHAPES,
+                avoid_words=avoid_words,
+            )
+        )
+        if puzzles:
+            return puzzles, records
+
+
+def run_serial(
+    args,
+    word_index,
+    writer: BankWriter | StoreWriter,
+    forced_words: list[str],
+    rng: random.Random,
+    stats_log: StatsLog | None = None,
+    answers: AnswerTracker | None = None,
+) -> int:
+    config = solver_config_from_args(args)
+    answers = answers or AnswerTracker(None, 0)
+    recent_shapes = RecentShapes(args.recent_shapes) if args.recent_shapes else None
+
+    def record_stats(stats: SolveStats, puzzle: Puzzle | None) -> None:
+        if stats_log:
+            stats_log.write(stats_record(stats, puzzle))
+
+    generated = 0
+    # Only the first fill of a shape carries the forced word, so the cursor moves when
+    # that fill is written, not with every generated puzzle.
+    forced_cursor = 0
+    while True:
+        forced_word = forced_words[forced_cursor] if forced_cursor < len(forced_words) else None
+        for position, puzzle in enumerate(generate_fills(
+            word_index=word_index,
+            rng=rng,
+            time_limit_s=args.time_limit,
+            hash_func=HASH_FUNCS[args.hash_mode],
+            id_func=puzzle_id_from_hash,
+            fills=args.fills_per_shape,
+            max_shared=args.max_shared_answers,
+            forced_word=forced_word,
+            config=config,
+            record_stats=record_stats,
+            recent_shapes=recent_shapes,
+            avoid_words=answers.avoid,
+        )):
+            name = writer.write(puzzle)
+            if not name:
+                continue
+            if forced_word and position == 0:
+                forced_cursor += 1
+
+            answers.record(puzzle)
+            print(f"Generated {name} ({puzzle.puzzle_id})")
+            generated += 1
+
+            if args.max and generated >= args.max:
+                print("Reached max puzzle count. Stopping engine.")
+                return generated
+
+            if args.sleep:
+                time.sleep(args.sleep)
+
+
+def run_parallel(
+    args,
+    writer: BankWriter | StoreWriter,
+    forced_words: list[str],
+    rng: random.Random,
+    stats_log: StatsLog | None = None,
+    answers: AnswerTracker | None = None,
+) -> int:
+    answers = answers or AnswerTracker(None, 0)
+    compiled_index = None if args.no_compiled_index else Path(args.compiled_index)
+    template_cache = Path(args.template_cache) if args.template_cache else None
+    black_set_catalog = Path(args.black_set_catalog) if args.black_set_catalog else None
+    executor = ProcessPoolExecutor(
+        max_workers=args.workers,
+        initializer=init_worker,
+        initargs=(
+            args.index,
+            Path(args.wordlists_dir),
+            compiled_index,
+            args.cache_size,
+            template_cache,
+            black_set_catalog,
+            args.recent_shapes,
+        ),
+    )
+    config = solver_config_from_args(args)
+    pending_forced = list(reversed(forced_words))
+    in_flight: dict = {}
+    generated = 0
+
+    def submit() -> None:
+        forced_word = pending_forced.pop() if pending_forced else None
+        future = executor.submit(
+            generate_in_worker,
+            rng.getrandbits(64),
+            args.time_limit,
+            forced_word,
+            config,
+            args.hash_mode,
+            stats_log is not None,
+            frozenset(answers.avoid),
+            args.fills_per_shape,
+            args.max_shared_answers,
+        )
+        in_flight[future] = forced_word
+
+    try:
+        for _ in range(args.workers * 2):
+            submit()
+        while True:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                forced_word = in_flight.pop(future)
+                puzzles, records = future.result()
+                if stats_log:
+                    for record in records:
+                        stats_log.write(record)
+                for position, puzzle in enumerate(puzzles):
+                    name = writer.write(puzzle)
+                    if not name:
+                        # Only the first fill of a shape carries the forced word.
+                        if forced_word and position == 0:
+                            pending_forced.append(forced_word)
+                        continue
+
+                    answers.record(puzzle)
+                    print(f"Generated {name} ({puzzle.puzzle_id})")
+                    generated += 1
+                    if args.max and generated >= args.max:
+                        print("Reached max puzzle count. Stopping engine.")
+                        return generated
+
+            while len(in_flight) < args.workers * 2:
+                submit()
+    finally:
+        # shutdown(cancel_futures=True) is Python 3.9+; cancelling by hand is equivalent.
+        for future in in_flight:
+            future.cancel()
+        executor.shutdown(wait=False)
 
 
 def main() -> int:
@@ -70,8 +442,140 @@ def main() -> int:
     )
     parser.add_argument("--seed", type=int, default=None, help="Seed for randomness")
     parser.add_argument("--time-limit", type=float, default=2.5, help="Solver time limit in seconds")
+    parser.add_argument(
+        "--node-limit",
+        type=int,
+        default=None,
+        help="Solver node budget per attempt; replaces --time-limit and makes --seed runs reproducible",
+    )
+    parser.add_argument(
+        "--restart-base",
+        type=int,
+        default=0,
+        help="Restart the search on the same grid after Luby-sequence multiples of N nodes (0 = off)",
+    )
     parser.add_argument("--sleep", type=float, default=0.0, help="Sleep between puzzles")
     parser.add_argument("--max", type=int, default=0, help="Stop after generating N puzzles")
+    parser.add_argument(
+        "--index",
+        choices=["bitset", "set", "numpy"],
+        default="bitset",
+        help="Word index implementation used by the solver",
+    )
+    parser.add_argument(
+        "--strategy",
+        choices=SOLVER_STRATEGIES,
+        default=None,
+        help=(
+            "Solver search strategy (default: domains with --index bitset, else pattern; "
+            "domains needs --index bitset)"
+        ),
+    )
+    parser.add_argument(
+        "--propagation",
+        choices=PROPAGATION_MODES,
+        default="forward",
+        help="Domain pruning for the domains strategy: forward check or full AC-3",
+    )
+    parser.add_argument(
+        "--backjump",
+        action="store_true",
+        help="Use conflict-directed backjumping in the domains strategy",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=DEFAULT_CACHE_SIZE,
+        help="Maximum cached candidate patterns (LRU eviction, 0 = unbounded)",
+    )
+    parser.add_argument(
+        "--compiled-index",
+        default=str(Path(__file__).resolve().parent / ".cache" / "wordlist_index.bin"),
+        help="Compiled wordlist index (rebuilt automatically when the wordlists change)",
+    )
+    parser.add_argument(
+        "--no-compiled-index",
+        action="store_true",
+        help="Always rebuild the bitset index from the wordlist text files",
+    )
+    parser.add_argument(
+        "--black-set-catalog",
+        default=str(Path(__file__).resolve().parent / ".cache" / "black_sets.json"),
+        help="Precomputed black-cell catalog file ('' to enumerate on demand)",
+    )
+    parser.add_argument(
+        "--template-cache",
+        default="",
+        help=(
+            "Preload slot templates from this file, precomputing it if missing "
+            "(default: build each template on first use, which is cheaper)"
+        ),
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of generator processes (1 = generate in-process)",
+    )
+    parser.add_argument(
+        "--hash-mode",
+        choices=sorted(HASH_FUNCS),
+        default="literal",
+        help="Puzzle hash used for dedupe; 'canonical' also matches transposed grids "
+        "(rehash an existing bank with scripts/rehash_bank.py first)",
+    )
+    parser.add_argument(
+        "--recent-shapes",
+        type=int,
+        default=32,
+        help="Skip black-cell shapes symmetric to one of the last N tried (0 = off)",
+    )
+    parser.add_argument(
+        "--answer-index",
+        default=str(Path(__file__).resolve().parent / ".cache" / "answer_index.jsonl"),
+        help="Answer -> puzzle id index over Puzzles/ and app resources, updated per puzzle "
+        "('' to disable)",
+    )
+    parser.add_argument(
+        "--max-answer-uses",
+        type=int,
+        default=0,
+        help="Avoid answers already used in N or more bank puzzles (0 = off)",
+    )
+    parser.add_argument(
+        "--avoid-policy",
+        choices=AVOID_POLICIES,
+        default="reject",
+        help="Overused answers are never placed (reject) or only tried last (demote)",
+    )
+    parser.add_argument(
+        "--fills-per-shape",
+        type=int,
+        default=1,
+        help="Fill each chosen grid shape up to N times before picking a new one",
+    )
+    parser.add_argument(
+        "--max-shared-answers",
+        type=int,
+        default=0,
+        help="Answers a fill may share with an earlier fill of the same shape",
+    )
+    parser.add_argument(
+        "--value-order",
+        choices=VALUE_ORDERS,
+        default="random",
+        help="Try candidate words in random order or weighted toward least-constraining (lcv)",
+    )
+    parser.add_argument(
+        "--store",
+        default="",
+        help="Write puzzles to this SQLite puzzle store instead of JSON files in --output-dir",
+    )
+    parser.add_argument(
+        "--stats-file",
+        default="",
+        help="Append one JSON line of search statistics per solve attempt to this file",
+    )
     parser.add_argument(
         "--words",
         nargs="*",
@@ -79,85 +583,77 @@ def main() -> int:
         help="Words to force into the first puzzles (one per puzzle, in order)",
     )
     args = parser.parse_args()
+    if args.fills_per_shape < 1:
+        parser.error("--fills-per-shape must be at least 1")
+    # Domains search runs on bitset masks only; the numpy index is used through the
+    # pattern strategy's batched counts, and the set index has neither.
+    if args.strategy is None:
+        args.strategy = "domains" if args.index == "bitset" else "pattern"
+    elif args.strategy == "domains" and args.index != "bitset":
+        parser.error(f"--strategy domains needs --index bitset, not {args.index}")
 
     rng = random.Random(args.seed)
     output_dir = Path(args.output_dir)
-    output_dir.mkdir(parents=True, exist_ok=True)
+    if not args.store:
+        output_dir.mkdir(parents=True, exist_ok=True)
 
     wordlists_dir = Path(args.wordlists_dir)
-    word_data = load_words(wordlists_dir, min_len=2, max_len=7)
-    if not word_data.words:
+    compiled_index = None if args.no_compiled_index else Path(args.compiled_index)
+    word_index = build_word_index(args.index, wordlists_dir, compiled_index, args.cache_size)
+    if not word_index.words:
         raise SystemExit(f"No words loaded from {wordlists_dir}")
 
-    word_index = WordIndex(word_data.words)
-
-    hash_path = output_dir / "_hashes.txt"
-    existing_hashes = load_existing_hashes(hash_path)
-    index = next_index(output_dir)
+    prepare_black_set_catalog(Path(args.black_set_catalog) if args.black_set_catalog else None)
+    templates = prepare_templates(Path(args.template_cache) if args.template_cache else None)
 
+    if args.store:
+        writer = StoreWriter(Path(args.store), output_dir / "_hashes.txt")
+    else:
+        writer = BankWriter(output_dir)
     forced_words = normalize_forced_words(args.words)
 
-    print(f"Loaded {len(word_data.words)} words")
-    print(f"Existing puzzle hashes: {len(existing_hashes)}")
-    print(f"Writing puzzles to: {output_dir}")
+    print(f"Loaded {len(word_index.words)} words")
+    if templates:
+        print(f"Slot templates: {templates}")
+    print(f"Existing puzzle hashes: {len(writer)}")
+    print(f"Writing puzzles to: {args.store or output_dir}")
     if forced_words:
         print(f"Forced words queued: {len(forced_words)}")
+    if args.workers > 1:
+        print(f"Workers: {args.workers}")
+    if args.fills_per_shape > 1:
+        print(f"Fills per shape: {args.fills_per_shape} (max {args.max_shared_answers} shared answers)")
+    answer_index = None
+    if args.answer_index:
+        repo_root = Path(__file__).resolve().parents[1]
+        answer_index = load_or_build(
+            Path(args.answer_index),
+            [repo_root / "Puzzles", repo_root / "mini-crossword" / "Resources"],
+        )
+        print(f"Answer index: {len(answer_index)} puzzles")
+    answers = AnswerTracker(answer_index, args.max_answer_uses)
+    if answers.avoid:
+        print(f"Avoiding {len(answers.avoid)} answers used in {args.max_answer_uses}+ puzzles")
+    stats_log = StatsLog(Path(args.stats_file)) if args.stats_file else None
+    if stats_log:
+        print(f"Writing search statistics to: {stats_log.path}")
 
     try:
-        generated = 0
-        while True:
-            forced_word = forced_words[generated] if generated < len(forced_words) else None
-            try:
-                puzzle = generate_puzzle(
-                    word_index=word_index,
-                    rng=rng,
-                    time_limit_s=args.time_limit,
-                    hash_func=puzzle_hash,
-                    id_func=puzzle_id_from_hash,
-                    forced_word=forced_word,
-                )
-            except SolverTimeout:
-                continue
-
-            if not puzzle:
-                continue
-
-            if puzzle.hash_hex in existing_hashes:
-                continue
-
-            grid_preview = [
-                "".join("-" if cell is None else cell for cell in row)
-                for row in puzzle.grid_solution
-            ]
-            puzzle_data = {
-                "gridPreview": grid_preview,
-                "id": puzzle.puzzle_id,
-                "date": "",
-                "width": puzzle.width,
-                "height": puzzle.height,
-                "blackCells": [[r, c] for r, c in puzzle.black_cells],
-                "gridSolution": puzzle.grid_solution,
-                "entries": puzzle.entries,
-            }
-
-            output_path = output_dir / f"puzzle_{index:06d}.json"
-            output_path.write_text(json.dumps(puzzle_data, indent=2))
-            append_hash(hash_path, puzzle.hash_hex)
-            existing_hashes.add(puzzle.hash_hex)
-
-            print(f"Generated {output_path.name} ({puzzle.puzzle_id})")
-            index += 1
-            generated += 1
-
-            if args.max and generated >= args.max:
-                print("Reached max puzzle count. Stopping engine.")
-                return 0
-
-            if args.sleep:
-                time.sleep(args.sleep)
+        if args.workers > 1:
+            run_parallel(args, writer, forced_words, rng, stats_log, answers)
+        else:
+            run_serial(args, word_index, writer, forced_words, rng, stats_log, answers)
+            print_cache_stats(word_index)
+        return 0
     except KeyboardInterrupt:
         print("Stopping engine.")
+        if args.workers <= 1:
+            print_cache_stats(word_index)
         return 0
+    finally:
+        writer.close()
+        if stats_log:
+            stats_log.close()
 
 
 if __name__ == "__main__":
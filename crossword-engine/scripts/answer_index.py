@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from crossword_engine.answers import AnswerIndex  # noqa: E402
+
+
+def main() -> int:
+    engine_dir = Path(__file__).resolve().parents[1]
+    repo_root = engine_dir.parent
+    parser = argparse.ArgumentParser(description="Rebuild or query the answer -> puzzle id index.")
+    parser.add_argument("command", choices=["rebuild", "top", "lookup"])
+    parser.add_argument("words", nargs="*", help="Answers to look up")
+    parser.add_argument(
+        "--index", default=str(engine_dir / ".cache" / "answer_index.jsonl"), help="Index file"
+    )
+    parser.add_argument(
+        "--roots",
+        nargs="*",
+        default=[str(repo_root / "Puzzles"), str(repo_root / "mini-crossword" / "Resources")],
+        help="Directories scanned for puzzle_*.json files on rebuild",
+    )
+    parser.add_argument("--count", type=int, default=25, help="Answers listed by 'top'")
+    args = parser.parse_args()
+
+    index_path = Path(args.index)
+    if args.command == "rebuild":
+        index = AnswerIndex.build(index_path, [Path(root) for root in args.roots])
+        print(f"Indexed {len(index)} puzzles into {index_path}")
+        return 0
+
+    index = AnswerIndex.load(index_path)
+    if index is None:
+        print(f"No answer index at {index_path}; run 'rebuild' first", file=sys.stderr)
+        return 1
+    if args.command == "top":
+        for answer, uses in index.most_used(args.count):
+            print(f"{uses:>5}  {answer}")
+    else:
+        for word in args.words:
+            answer = word.strip().upper()
+            print(f"{answer}: {index.usage(answer)} {' '.join(sorted(index.puzzles_for(answer)))}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
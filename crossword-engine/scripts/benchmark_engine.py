@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import random
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+from dataclasses import replace
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from crossword_engine.compiled import load_or_compile  # noqa: E402
+from crossword_engine.crossings import crossing_tables  # noqa: E402
+from crossword_engine.generator import (  # noqa: E402
+    _BLACK_SET_CACHE,
+    GRID_SIZES,
+    PROPAGATION_MODES,
+    SOLVER_STRATEGIES,
+    SolverConfig,
+    SolverTimeout,
+    VALUE_ORDERS,
+    solve_grid,
+    valid_black_sets,
+)
+from crossword_engine.grid import build_solution_grid  # noqa: E402
+from crossword_engine.hashing import puzzle_hash  # noqa: E402
+from crossword_engine.search import SolveStats  # noqa: E402
+from crossword_engine.templates import get_template  # noqa: E402
+from crossword_engine.trie_fill import prefix_tables  # noqa: E402
+
+PERCENTILES = (50, 90, 99)
+
+
+def percentiles(samples: list[float]) -> dict[str, float]:
+    if not samples:
+        return {f"p{p}": 0.0 for p in PERCENTILES}
+    if len(samples) == 1:
+        return {f"p{p}": samples[0] for p in PERCENTILES}
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return {f"p{p}": cuts[p - 1] for p in PERCENTILES}
+
+
+def clear_pattern_caches(word_index) -> None:
+    for name in ("cache", "count_cache"):
+        cache = getattr(word_index, name, None)
+        if cache is not None:
+            cache.clear()
+
+
+def run_size(
+    word_index,
+    width: int,
+    height: int,
+    config: SolverConfig,
+    seed: int,
+    shapes: int,
+    time_limit_s: float,
+) -> dict:
+    # Every configuration starts cold, so configs run later get no head start.
+    clear_pattern_caches(word_index)
+    rng = random.Random(seed)
+    candidates = valid_black_sets(width, height)
+    result = {
+        "solved": 0,
+        "unsat": 0,
+        "timeouts": 0,
+        "nodes": 0,
+        "backjumps": 0,
+        "restarts": 0,
+        "elapsed_s": 0.0,
+    }
+    latencies: list[float] = []
+    for _ in range(shapes):
+        black_cells = rng.choice(candidates)
+        stats = SolveStats()
+        start = time.perf_counter()
+        try:
+            solved = solve_grid(
+                width, height, black_cells, word_index, rng, time_limit_s, config=config, stats=stats
+            )
+            result["solved" if solved else "unsat"] += 1
+        except SolverTimeout:
+            result["timeouts"] += 1
+        latency = time.perf_counter() - start
+        latencies.append(latency)
+        result["elapsed_s"] += latency
+        result["nodes"] += stats.nodes
+        result["backjumps"] += stats.backjumps
+        result["restarts"] += stats.restarts
+
+    elapsed = result["elapsed_s"]
+    result["puzzles_per_s"] = result["solved"] / elapsed if elapsed else 0.0
+    result["nodes_per_s"] = result["nodes"] / elapsed if elapsed else 0.0
+    result["timeout_rate"] = result["timeouts"] / shapes if shapes else 0.0
+    result["latency_s"] = percentiles(latencies)
+    result["peak_memory_kib"] = peak_solve_memory(
+        word_index, width, height, config, seed, time_limit_s
+    )
+    return result
+
+
+def peak_solve_memory(
+    word_index, width: int, height: int, config: SolverConfig, seed: int, time_limit_s: float
+) -> float:
+    # Traced separately: tracemalloc slows allocation-heavy code enough to skew the timings.
+    rng = random.Random(seed)
+    black_cells = rng.choice(valid_black_sets(width, height))
+    tracemalloc.start()
+    try:
+        solve_grid(width, height, black_cells, word_index, rng, time_limit_s, config=config)
+    except SolverTimeout:
+        pass
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024
+
+
+def best_rate(run, count: int, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return count / best if best else 0.0
+
+
+def micro_benchmarks(word_index, seed: int, repeat: int) -> dict:
+    rng = random.Random(seed)
+    words = word_index.words
+    patterns: list[str] = []
+    for _ in range(5000):
+        word = rng.choice(words)
+        keep = set(rng.sample(range(len(word)), rng.randint(0, len(word) - 1)))
+        patterns.append("".join(ch if pos in keep else "." for pos, ch in enumerate(word)))
+
+    def uncached_candidates() -> None:
+        word_index.cache.clear()
+        for pattern in patterns:
+            word_index.candidates(pattern)
+
+    def cached_candidates() -> None:
+        for pattern in patterns:
+            word_index.candidates(pattern)
+
+    def black_sets() -> None:
+        for width, height in GRID_SIZES:
+            _BLACK_SET_CACHE.pop((width, height), None)
+            valid_black_sets(width, height)
+
+    grids = []
+    for width, height in GRID_SIZES:
+        black_cells = rng.choice(valid_black_sets(width, height))
+        letters = {
+            (row, col): rng.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZ")
+            for row in range(height)
+            for col in range(width)
+        }
+        grids.append(
+            (width, height, black_cells, build_solution_grid(width, height, black_cells, letters))
+        )
+
+    def hashes() -> None:
+        for _ in range(200):
+            for grid in grids:
+                puzzle_hash(*grid)
+
+    # Solver grid state: the old dict of (row, col) -> letter against the flat
+    # bytearray the pattern solver now slices, on the same filled 7x6 template.
+    width, height, black_cells, _ = grids[-1]
+    template = get_template(width, height, black_cells)
+    letter_map = {
+        cell: rng.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZ")
+        for slot in template.slots
+        for cell in slot.cells
+    }
+    flat = bytearray(b"." * (width * height))
+    for (row, col), letter in letter_map.items():
+        flat[row * width + col] = ord(letter)
+
+    def dict_patterns() -> None:
+        for _ in range(200):
+            for slot in template.slots:
+                "".join(letter_map.get(cell) or "." for cell in slot.cells)
+
+    def flat_patterns() -> None:
+        for _ in range(200):
+            for start, stop, step in template.spans:
+                flat[start:stop:step].decode("ascii")
+
+    def traced_bytes(build) -> int:
+        tracemalloc.start()
+        state = build()
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del state
+        return size
+
+    patterns_built = 200 * len(template.slots)
+    return {
+        "candidates_uncached_per_s": best_rate(uncached_candidates, len(patterns), repeat),
+        "candidates_cached_per_s": best_rate(cached_candidates, len(patterns), repeat),
+        "valid_black_sets_per_s": best_rate(black_sets, len(GRID_SIZES), repeat),
+        "puzzle_hash_per_s": best_rate(hashes, 200 * len(grids), repeat),
+        "slot_patterns_dict_per_s": best_rate(dict_patterns, patterns_built, repeat),
+        "slot_patterns_flat_per_s": best_rate(flat_patterns, patterns_built, repeat),
+        "grid_state_dict_bytes": traced_bytes(lambda: dict(letter_map)),
+        "grid_state_flat_bytes": traced_bytes(lambda: bytearray(flat)),
+    }
+
+
+def main() -> int:
+    engine_dir = Path(__file__).resolve().parents[1]
+    parser = argparse.ArgumentParser(description="Benchmark solver strategies per grid size.")
+    parser.add_argument("--wordlists-dir", default=str(engine_dir / "wordlists"))
+    parser.add_argument(
+        "--compiled-index", default=str(engine_dir / ".cache" / "wordlist_index.bin")
+    )
+    parser.add_argument("--strategies", nargs="*", default=SOLVER_STRATEGIES, choices=SOLVER_STRATEGIES)
+    parser.add_argument(
+        "--propagation",
+        nargs="*",
+        default=["forward"],
+        choices=PROPAGATION_MODES,
+        help="Propagation modes to compare (domains strategy only)",
+    )
+    parser.add_argument(
+        "--backjump",
+        action="store_true",
+        help="Also run each domains configuration with conflict-directed backjumping",
+    )
+    parser.add_argument(
+        "--value-order",
+        nargs="*",
+        default=["random"],
+        choices=VALUE_ORDERS,
+        help="Value orderings to compare (pattern and domains strategies)",
+    )
+    parser.add_argument(
+        "--restart-base",
+        type=int,
+        default=0,
+        help="Luby restart unit in nodes applied to every configuration (0 = off)",
+    )
+    parser.add_argument(
+        "--node-limit",
+        type=int,
+        default=None,
+        help="Deterministic node budget per solve instead of --time-limit",
+    )
+    parser.add_argument("--shapes", type=int, default=10, help="Shapes solved per grid size")
+    parser.add_argument("--time-limit", type=float, default=2.5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="Micro-benchmark repetitions (best kept)")
+    parser.add_argument("--output", help="Write results as JSON to this path ('-' for stdout)")
+    args = parser.parse_args()
+
+    word_index = load_or_compile(Path(args.wordlists_dir), Path(args.compiled_index), 2, 7)
+    # Per-index tables are one-off setup shared by all runs; build them before timing.
+    crossing_tables(word_index)
+    prefix_tables(word_index)
+    # Human-readable lines go to stderr when stdout carries the JSON report.
+    log = sys.stderr if args.output == "-" else sys.stdout
+
+    limits = {"node_limit": args.node_limit, "restart_base": args.restart_base}
+    configs = [SolverConfig(strategy="pattern", **limits)] if "pattern" in args.strategies else []
+    if "trie" in args.strategies:
+        configs.append(SolverConfig(strategy="trie", **limits))
+    if "domains" in args.strategies:
+        for mode in args.propagation:
+            configs.append(SolverConfig(strategy="domains", propagation=mode, **limits))
+            if args.backjump:
+                configs.append(
+                    SolverConfig(strategy="domains", propagation=mode, backjump=True, **limits)
+                )
+
+    # The trie fill picks letters, not words, so value ordering does not apply to it.
+    configs = [
+        replace(config, value_order=order)
+        for config in configs
+        for order in (args.value_order if config.strategy != "trie" else ["random"])
+    ]
+
+    results = []
+    for width, height in GRID_SIZES:
+        for config in configs:
+            label = config.strategy
+            if config.strategy == "domains":
+                label += f"/{config.propagation}" + ("+cbj" if config.backjump else "")
+            if config.value_order != "random":
+                label += f"+{config.value_order}"
+            result = run_size(
+                word_index, width, height, config, args.seed, args.shapes, args.time_limit
+            )
+            latency = result["latency_s"]
+            print(
+                f"{width}x{height} {label:>19}: solved {result['solved']}, "
+                f"unsat {result['unsat']}, timeouts {result['timeouts']}, "
+                f"{result['nodes']} nodes, {result['backjumps']} backjumps, "
+                f"{result['restarts']} restarts, "
+                f"{result['nodes_per_s']:,.0f} nodes/sec, "
+                f"{result['puzzles_per_s']:.2f} puzzles/sec, "
+                f"p50/p99 {latency['p50'] * 1000:.0f}/{latency['p99'] * 1000:.0f} ms, "
+                f"peak {result['peak_memory_kib']:,.0f} KiB",
+                file=log,
+            )
+            results.append({"size": f"{width}x{height}", "config": label, **result})
+
+    micro = micro_benchmarks(word_index, args.seed, args.repeat)
+    for name, rate in micro.items():
+        print(f"{name}: {rate:,.0f}", file=log)
+
+    if args.output:
+        report = {
+            "seed": args.seed,
+            "shapes": args.shapes,
+            "time_limit_s": args.time_limit,
+            "node_limit": args.node_limit,
+            "restart_base": args.restart_base,
+            "python": platform.python_version(),
+            "words": len(word_index.words),
+            "max_rss_kib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            "sizes": results,
+            "micro": micro,
+        }
+        text = json.dumps(report, indent=2)
+        if args.output == "-":
+            print(text)
+        else:
+            Path(args.output).write_text(text + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
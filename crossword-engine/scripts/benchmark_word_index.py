@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from crossword_engine.wordlist import BitsetWordIndex, WordIndex, load_words  # noqa: E402
+
+
+def sample_patterns(words: list[str], count: int, rng: random.Random) -> list[str]:
+    patterns: list[str] = []
+    for _ in range(count):
+        word = rng.choice(words)
+        keep = rng.randint(0, len(word) - 1)
+        positions = set(rng.sample(range(len(word)), keep))
+        patterns.append("".join(ch if pos in positions else "." for pos, ch in enumerate(word)))
+    return patterns
+
+
+def time_queries(index, patterns: list[str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        index.cache.clear()
+        start = time.perf_counter()
+        for pattern in patterns:
+            index.candidates(pattern)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark set-based vs bitset word indexes.")
+    parser.add_argument(
+        "--wordlists-dir",
+        default=str(Path(__file__).resolve().parents[1] / "wordlists"),
+        help="Directory containing wordlist files",
+    )
+    parser.add_argument("--patterns", type=int, default=20000, help="Number of distinct query patterns")
+    parser.add_argument("--repeat", type=int, default=3, help="Timing repetitions (best is reported)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    word_data = load_words(Path(args.wordlists_dir), min_len=2, max_len=7)
+    if not word_data.words:
+        print(f"No words loaded from {args.wordlists_dir}", file=sys.stderr)
+        return 1
+
+    rng = random.Random(args.seed)
+    patterns = sample_patterns(word_data.words, args.patterns, rng)
+
+    indexes = []
+    for name, cls in (("set", WordIndex), ("bitset", BitsetWordIndex)):
+        start = time.perf_counter()
+        index = cls(word_data.words)
+        indexes.append((name, index, time.perf_counter() - start))
+
+    for pattern in patterns[:1000]:
+        expected = sorted(indexes[0][1].candidates(pattern))
+        for name, index, _ in indexes[1:]:
+            if sorted(index.candidates(pattern)) != expected:
+                print(f"{name}: mismatch for pattern {pattern}", file=sys.stderr)
+                return 1
+
+    print(f"Words: {len(word_data.words)}  patterns: {len(patterns)}")
+    for name, index, build_s in indexes:
+        elapsed = time_queries(index, patterns, args.repeat)
+        print(
+            f"{name:>7}: build {build_s * 1000:.1f} ms, "
+            f"{len(patterns) / elapsed:,.0f} queries/sec (candidates)"
+        )
+
+    bitset = indexes[1][1]
+    start = time.perf_counter()
+    for pattern in patterns:
+        bitset.count(pattern)
+    elapsed = time.perf_counter() - start
+    print(f"{'bitset':>7}: {len(patterns) / elapsed:,.0f} queries/sec (count only)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from crossword_engine.compiled import CompiledWordIndex, compile_word_index  # noqa: E402
+
+
+def main() -> int:
+    engine_dir = Path(__file__).resolve().parents[1]
+    parser = argparse.ArgumentParser(description="Compile wordlists into a memory-mapped index file.")
+    parser.add_argument(
+        "--wordlists-dir",
+        default=str(engine_dir / "wordlists"),
+        help="Directory containing wordlist files",
+    )
+    parser.add_argument(
+        "--output",
+        default=str(engine_dir / ".cache" / "wordlist_index.bin"),
+        help="Compiled index file to write",
+    )
+    parser.add_argument("--min-length", type=int, default=2)
+    parser.add_argument("--max-length", type=int, default=7)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    output_path = compile_word_index(
+        Path(args.wordlists_dir), Path(args.output), args.min_length, args.max_length
+    )
+    compile_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    index = CompiledWordIndex(output_path)
+    load_s = time.perf_counter() - start
+
+    size_kb = output_path.stat().st_size / 1024
+    print(f"Compiled {len(index.words)} words -> {output_path} ({size_kb:.0f} KiB)")
+    print(f"Compile: {compile_s * 1000:.1f} ms, load: {load_s * 1000:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
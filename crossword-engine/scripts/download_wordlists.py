@@ -1,12 +1,16 @@
 #!/usr/bin/env python3
 import argparse
+import hashlib
 import json
+import os
 import re
 import shutil
-import subprocess
 import sys
+import urllib.error
 import urllib.request
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Iterable, Iterator
 
 WORD_RE = re.compile(r"^[A-Z]+$")
 TOKEN_RE = re.compile(r"[A-Za-z]+")
@@ -31,20 +35,90 @@ def normalized_tokens(raw: str, split_tokens: bool) -> list[str]:
     return normalized
 
 
-def fetch_text(url: str) -> str:
-    if shutil.which("curl"):
-        result = subprocess.run(
-            ["curl", "-fsSL", url], capture_output=True, text=True, check=False
-        )
-        if result.returncode != 0:
-            raise RuntimeError(result.stderr.strip() or f"curl failed for {url}")
-        return result.stdout
-    with urllib.request.urlopen(url) as response:
-        return response.read().decode("utf-8")
+USER_AGENT = "mini-crossword-wordlists/1.0"
+CHUNK_SIZE = 1 << 16
+
+
+def cache_paths(cache_dir: Path, url: str) -> tuple[Path, Path]:
+    key = hashlib.sha256(url.encode("utf-8")).hexdigest()[:24]
+    return cache_dir / f"{key}.body", cache_dir / f"{key}.meta.json"
+
+
+def fetch_to_cache(
+    url: str, cache_dir: Path, timeout: float, offline: bool = False
+) -> tuple[Path, str]:
+    body_path, meta_path = cache_paths(cache_dir, url)
+    meta: dict = {}
+    if body_path.exists() and meta_path.exists():
+        try:
+            meta = json.loads(meta_path.read_text())
+        except json.JSONDecodeError:
+            meta = {}
+    if offline:
+        if not body_path.exists():
+            raise RuntimeError(f"not cached: {url}")
+        return body_path, "offline"
+
+    request = urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
+    if meta.get("etag"):
+        request.add_header("If-None-Match", meta["etag"])
+    if meta.get("last_modified"):
+        request.add_header("If-Modified-Since", meta["last_modified"])
+
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            tmp_path = body_path.with_name(f"{body_path.name}.{os.getpid()}.tmp")
+            with tmp_path.open("wb") as handle:
+                shutil.copyfileobj(response, handle, CHUNK_SIZE)
+            os.replace(tmp_path, body_path)
+            meta = {
+                "url": url,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+            }
+            meta_path.write_text(json.dumps(meta, indent=2))
+            return body_path, "downloaded"
+    except urllib.error.HTTPError as exc:
+        if exc.code == 304 and body_path.exists():
+            return body_path, "not modified"
+        raise RuntimeError(f"HTTP {exc.code} for {url}") from exc
+    except urllib.error.URLError as exc:
+        raise RuntimeError(f"{exc.reason} for {url}") from exc
+
+
+def fetch_all(
+    urls: Iterable[str], cache_dir: Path, jobs: int, timeout: float, offline: bool
+) -> dict[str, Path]:
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    unique_urls = sorted(set(urls))
+    fetched: dict[str, Path] = {}
+
+    def fetch(url: str) -> tuple[str, Path | None, str]:
+        try:
+            path, status = fetch_to_cache(url, cache_dir, timeout, offline)
+            return url, path, status
+        except RuntimeError as exc:
+            return url, None, str(exc)
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        for url, path, status in executor.map(fetch, unique_urls):
+            if path is None:
+                print(f"Failed: {status}", file=sys.stderr)
+                continue
+            print(f"{status}: {url}")
+            fetched[url] = path
+    return fetched
+
+
+def iter_text_lines(path: Path) -> Iterator[str]:
+    with path.open("r", encoding="utf-8", errors="replace") as handle:
+        for line in handle:
+            yield line.rstrip("\r\n")
 
 
-def fetch_json(url: str) -> dict:
-    return json.loads(fetch_text(url))
+def read_json(path: Path):
+    with path.open("r", encoding="utf-8") as handle:
+        return json.load(handle)
 
 
 def parse_us_airport_codes_iata(payload: dict) -> list[str]:
@@ -161,17 +235,16 @@ def load_sources(sources_path: Path) -> dict:
     return json.loads(sources_path.read_text())
 
 
-def collect_words_for_source(source: dict) -> list[str]:
+def collect_words_for_source(source: dict, fetched: dict[str, Path]) -> Iterable[str]:
     fmt = source.get("format")
     url = source.get("url")
-    if not url:
+    if not url or url not in fetched:
         return []
 
     if fmt == "text":
-        text = fetch_text(url)
-        return [line for line in text.splitlines()]
+        return iter_text_lines(fetched[url])
     if fmt == "json":
-        payload = fetch_json(url)
+        payload = read_json(fetched[url])
         parser = source.get("parser")
         if parser == "us_airport_codes_iata":
             return parse_us_airport_codes_iata(payload)
@@ -206,11 +279,13 @@ def write_wordlist(path: Path, words: set[str]) -> None:
     path.write_text("\n".join(sorted_words) + ("\n" if sorted_words else ""))
 
 
-def load_frequency_words(sources: dict, min_len: int, max_len: int) -> set[str]:
+def load_frequency_words(
+    sources: dict, fetched: dict[str, Path], min_len: int, max_len: int
+) -> set[str]:
     entries = sources.get("frequency", [])
     words: set[str] = set()
     for source in entries:
-        for raw in collect_words_for_source(source):
+        for raw in collect_words_for_source(source, fetched):
             for normalized in normalized_tokens(str(raw), False):
                 if min_len <= len(normalized) <= max_len:
                     words.add(normalized)
@@ -224,20 +299,41 @@ def main() -> int:
         default=str(Path(__file__).resolve().parents[1] / "wordlists"),
         help="Directory for wordlists and word_sources.json",
     )
+    parser.add_argument(
+        "--sources",
+        default=None,
+        help="Sources file to use instead of <wordlists-dir>/word_sources.json "
+        "(e.g. one pointing at a local HTTP server)",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=str(Path(__file__).resolve().parents[1] / ".cache" / "downloads"),
+        help="Download cache; unchanged sources are revalidated with ETag/Last-Modified",
+    )
+    parser.add_argument("--jobs", type=int, default=8, help="Concurrent downloads")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-request timeout in seconds")
+    parser.add_argument(
+        "--offline", action="store_true", help="Use cached downloads only; make no requests"
+    )
     parser.add_argument("--min-length", type=int, default=2)
     parser.add_argument("--max-length", type=int, default=7)
     args = parser.parse_args()
 
     wordlists_dir = Path(args.wordlists_dir)
-    sources_path = wordlists_dir / "word_sources.json"
+    sources_path = Path(args.sources) if args.sources else wordlists_dir / "word_sources.json"
 
     if not sources_path.exists():
         print(f"Missing word_sources.json at {sources_path}", file=sys.stderr)
         return 1
 
     sources = load_sources(sources_path)
+    urls = [source["url"] for entries in sources.values() for source in entries if source.get("url")]
+    fetched = fetch_all(urls, Path(args.cache_dir), args.jobs, args.timeout, args.offline)
+    if len(fetched) < len(set(urls)):
+        print("Some sources could not be fetched; wordlists left unchanged.", file=sys.stderr)
+        return 1
 
-    frequency_words = load_frequency_words(sources, args.min_length, args.max_length)
+    frequency_words = load_frequency_words(sources, fetched, args.min_length, args.max_length)
     if frequency_words:
         print(f"frequency: {len(frequency_words)} words (filter for core)")
 
@@ -247,7 +343,7 @@ def main() -> int:
         words: set[str] = set()
         for source in entries:
             split_tokens = bool(source.get("split_tokens"))
-            for raw in collect_words_for_source(source):
+            for raw in collect_words_for_source(source, fetched):
                 for normalized in normalized_tokens(str(raw), split_tokens):
                     if args.min_length <= len(normalized) <= args.max_length:
                         words.add(normalized)
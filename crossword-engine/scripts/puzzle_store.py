@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from crossword_engine.hashing import canonical_puzzle_hash, puzzle_hash  # noqa: E402
+from crossword_engine.store import PuzzleStore  # noqa: E402
+
+
+def main() -> int:
+    repo_root = Path(__file__).resolve().parents[2]
+    parser = argparse.ArgumentParser(
+        description="Move puzzles between a SQLite puzzle store and the puzzle_NNNNNN.json layout."
+    )
+    parser.add_argument("command", choices=["export", "import"])
+    parser.add_argument("--store", required=True, help="Puzzle store file")
+    parser.add_argument(
+        "--dir",
+        default=str(repo_root / "Puzzles" / "Puzzles_NO_CLUES"),
+        help="Puzzle JSON directory to export to or import from",
+    )
+    parser.add_argument("--start", type=int, default=1, help="First store sequence number to export")
+    parser.add_argument(
+        "--first-index",
+        type=int,
+        default=None,
+        help="File number of the first exported puzzle (default: after the highest in --dir)",
+    )
+    parser.add_argument(
+        "--overwrite",
+        action="store_true",
+        help="Replace puzzle files that already use the exported file numbers",
+    )
+    parser.add_argument(
+        "--hash-mode",
+        choices=["literal", "canonical"],
+        default="literal",
+        help="Hash used to dedupe imported puzzles (match run_engine --hash-mode)",
+    )
+    args = parser.parse_args()
+
+    store = PuzzleStore(Path(args.store))
+    try:
+        if args.command == "export":
+            try:
+                written = store.export_json(
+                    Path(args.dir),
+                    start_seq=args.start,
+                    first_index=args.first_index,
+                    overwrite=args.overwrite,
+                )
+            except FileExistsError as exc:
+                print(f"Export stopped: {exc}", file=sys.stderr)
+                return 1
+            print(f"Exported {written} puzzles to {args.dir}")
+        else:
+            hash_func = canonical_puzzle_hash if args.hash_mode == "canonical" else puzzle_hash
+            imported = store.import_json(Path(args.dir), hash_func=hash_func)
+            # After the files, so hashes of puzzles still present are imported with them.
+            seen = store.import_hashes(Path(args.dir) / "_hashes.txt")
+            print(f"Imported {imported} puzzles from {args.dir} ({len(store)} in store)")
+            print(f"Recorded {seen} earlier hashes from {args.dir}/_hashes.txt")
+    finally:
+        store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
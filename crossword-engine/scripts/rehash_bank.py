@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from crossword_engine.answers import AnswerIndex, iter_puzzle_files  # noqa: E402
+from crossword_engine.hashing import canonical_puzzle_hash, puzzle_hash  # noqa: E402
+
+HASH_FUNCS = {"literal": puzzle_hash, "canonical": canonical_puzzle_hash}
+
+
+def payload_hash(hash_func, payload: dict) -> str:
+    return hash_func(
+        payload["width"],
+        payload["height"],
+        [(r, c) for r, c in payload.get("blackCells", [])],
+        payload["gridSolution"],
+    )
+
+
+def main() -> int:
+    repo_root = Path(__file__).resolve().parents[2]
+    parser = argparse.ArgumentParser(
+        description="Add current puzzle hashes to _hashes.txt and report duplicate puzzles."
+    )
+    parser.add_argument(
+        "--dir",
+        default=str(repo_root / "Puzzles" / "Puzzles_NO_CLUES"),
+        help="Directory containing puzzle_NNNNNN.json files",
+    )
+    parser.add_argument(
+        "--hash-mode",
+        choices=sorted(HASH_FUNCS),
+        default="literal",
+        help="Hash to record (match run_engine --hash-mode)",
+    )
+    parser.add_argument(
+        "--published",
+        nargs="*",
+        default=[
+            str(repo_root / "Puzzles" / "Puzzles_FINISHED"),
+            str(repo_root / "mini-crossword" / "Resources"),
+        ],
+        help="Other puzzle roots (searched recursively) whose hashes must stay in the log",
+    )
+    parser.add_argument(
+        "--delete-duplicates",
+        action="store_true",
+        help="Delete every puzzle whose hash matches an earlier-numbered puzzle",
+    )
+    parser.add_argument(
+        "--answer-index",
+        default=str(Path(__file__).resolve().parents[1] / ".cache" / "answer_index.jsonl"),
+        help="Answer index to drop deleted duplicates from",
+    )
+    parser.add_argument("--dry-run", action="store_true", help="Report only; write nothing")
+    args = parser.parse_args()
+
+    puzzle_dir = Path(args.dir)
+    hash_func = HASH_FUNCS[args.hash_mode]
+    first_seen: dict[str, Path] = {}
+    duplicates: list[tuple[Path, Path]] = []
+    duplicate_ids: dict[Path, str] = {}
+    for path in sorted(puzzle_dir.glob("puzzle_*.json")):
+        payload = json.loads(path.read_text())
+        hash_hex = payload_hash(hash_func, payload)
+        if hash_hex in first_seen:
+            duplicates.append((path, first_seen[hash_hex]))
+            duplicate_ids[path] = payload.get("id", "")
+        else:
+            first_seen[hash_hex] = path
+
+    for path, original in duplicates:
+        print(f"{path.name} duplicates {original.name}")
+    print(f"{len(first_seen)} unique puzzles, {len(duplicates)} duplicates ({args.hash_mode} hash)")
+    if args.dry_run:
+        return 0
+
+    if args.delete_duplicates:
+        answer_index = AnswerIndex.load(Path(args.answer_index)) if args.answer_index else None
+        for path, _ in duplicates:
+            path.unlink()
+            if answer_index is not None:
+                answer_index.remove_puzzle(duplicate_ids[path])
+
+    # The log covers every puzzle ever generated, including ones that have moved on
+    # to the finished bank or the app, so existing lines are kept and the current
+    # hashes of every root are added alongside them.
+    hash_path = puzzle_dir / "_hashes.txt"
+    hashes: dict[str, None] = {}
+    if hash_path.exists():
+        hashes.update((line.strip(), None) for line in hash_path.read_text().splitlines() if line.strip())
+    kept = len(hashes)
+    hashes.update((hash_hex, None) for hash_hex in first_seen)
+    for path in iter_puzzle_files(Path(root) for root in args.published):
+        try:
+            payload = json.loads(path.read_text())
+        except json.JSONDecodeError:
+            continue
+        hashes[payload_hash(hash_func, payload)] = None
+
+    tmp_path = hash_path.with_name(f"{hash_path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text("".join(f"{hash_hex}\n" for hash_hex in hashes))
+    os.replace(tmp_path, hash_path)
+    print(f"Wrote {hash_path} ({kept} kept, {len(hashes) - kept} added)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -3,9 +3,15 @@ from __future__ import annotations
 
 import argparse
 import json
+import os
 import re
+import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from crossword_engine.compiled import compiled_source_digest, remove_compiled_words  # noqa: E402
+
 WORD_RE = re.compile(r"^[A-Z]+$")
 DEFAULT_WORDLIST_FILES = [
     "core.txt",
@@ -25,9 +31,9 @@ def normalize_word(raw: str) -> str | None:
     return word
 
 
-def infer_source_path(explicit: str | None) -> Path:
+def infer_source_paths(explicit: list[str] | None) -> list[Path]:
     if explicit:
-        return Path(explicit)
+        return [Path(path) for path in explicit]
 
     candidates = [
         Path("Puzzles/Puzzles_FINISHED/_low_confidence_clues.json"),
@@ -35,7 +41,7 @@ def infer_source_path(explicit: str | None) -> Path:
     ]
     for candidate in candidates:
         if candidate.exists():
-            return candidate
+            return [candidate]
     raise FileNotFoundError(
         "No low-confidence file found. Pass --source-json explicitly."
     )
@@ -77,25 +83,22 @@ def remove_words_from_file(path: Path, blocked_words: set[str], dry_run: bool) -
     if not path.exists():
         return 0, set()
 
-    lines = path.read_text(encoding="utf-8").splitlines()
-    kept: list[str] = []
     removed_words: set[str] = set()
     removed_count = 0
-
-    for line in lines:
-        stripped = line.strip()
-        normalized = normalize_word(stripped)
-        if normalized and normalized in blocked_words:
-            removed_count += 1
-            removed_words.add(normalized)
-            continue
-        kept.append(line)
-
-    if not dry_run and removed_count > 0:
-        output = "\n".join(kept)
-        if kept:
-            output += "\n"
-        path.write_text(output, encoding="utf-8")
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        with path.open("r", encoding="utf-8") as source, tmp_path.open("w", encoding="utf-8") as kept:
+            for line in source:
+                normalized = normalize_word(line)
+                if normalized and normalized in blocked_words:
+                    removed_count += 1
+                    removed_words.add(normalized)
+                    continue
+                kept.write(line if line.endswith("\n") else line + "\n")
+        if not dry_run and removed_count > 0:
+            os.replace(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
 
     return removed_count, removed_words
 
@@ -109,9 +112,11 @@ def main() -> int:
     )
     parser.add_argument(
         "--source-json",
+        action="extend",
+        nargs="+",
         default=None,
         help=(
-            "Path to low-confidence JSON file. If omitted, script tries: "
+            "Low-confidence JSON file(s); may be repeated. If omitted, script tries: "
             "Puzzles/Puzzles_FINISHED/_low_confidence_clues.json, then "
             "mini-crossword/Puzzles/Puzzles_FINISHED/_low_confidence_clues.json"
         ),
@@ -127,6 +132,14 @@ def main() -> int:
         default=DEFAULT_WORDLIST_FILES,
         help="Specific wordlist files to edit (default: core/names/geo/slang/abbreviations).",
     )
+    parser.add_argument(
+        "--compiled-index",
+        default=None,
+        help=(
+            "Also clear the removed words from this compiled engine index "
+            "(e.g. crossword-engine/.cache/wordlist_index.bin) instead of leaving it to be rebuilt."
+        ),
+    )
     parser.add_argument(
         "--dry-run",
         action="store_true",
@@ -134,22 +147,31 @@ def main() -> int:
     )
     args = parser.parse_args()
 
-    source_path = infer_source_path(args.source_json)
-    payload = json.loads(source_path.read_text(encoding="utf-8"))
-    blocked_words = extract_words_from_json(payload)
+    source_paths = infer_source_paths(args.source_json)
+    blocked_words: set[str] = set()
+    for source_path in source_paths:
+        payload = json.loads(source_path.read_text(encoding="utf-8"))
+        blocked_words |= extract_words_from_json(payload)
 
     if not blocked_words:
-        print(f"No valid A-Z words found in {source_path}")
+        print(f"No valid A-Z words found in {', '.join(map(str, source_paths))}")
         return 0
 
     wordlists_dir = Path(args.wordlists_dir)
     if not wordlists_dir.exists():
         raise FileNotFoundError(f"Wordlists directory not found: {wordlists_dir}")
 
-    print(f"Source JSON: {source_path}")
+    for source_path in source_paths:
+        print(f"Source JSON: {source_path}")
     print(f"Candidate blocked words: {len(blocked_words)}")
     print(f"Mode: {'dry-run' if args.dry_run else 'apply'}")
 
+    # Taken before editing: the compiled index is only patched if it matched the
+    # wordlists as they were.
+    previous_digest = None
+    if args.compiled_index and not args.dry_run:
+        previous_digest = compiled_source_digest(Path(args.compiled_index), wordlists_dir)
+
     removed_any: set[str] = set()
     total_removed_lines = 0
 
@@ -160,6 +182,17 @@ def main() -> int:
         removed_any |= removed_words
         print(f"{path}: removed {removed_count}")
 
+    if args.compiled_index and not args.dry_run:
+        index_path = Path(args.compiled_index)
+        if previous_digest is None:
+            print(f"No compiled index at {index_path}; it will be built on the next engine run")
+        else:
+            cleared = remove_compiled_words(index_path, wordlists_dir, removed_any, previous_digest)
+            if cleared is None:
+                print(f"{index_path} was already out of date; it will be rebuilt on the next engine run")
+            else:
+                print(f"{index_path}: cleared {cleared} words")
+
     not_found = sorted(blocked_words - removed_any)
     print(f"Total removed lines: {total_removed_lines}")
     print(f"Unique removed words: {len(removed_any)}")
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import random
+import sys
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from crossword_engine import generator  # noqa: E402
+from crossword_engine.grid import extract_slots  # noqa: E402
+from crossword_engine.hashing import puzzle_hash  # noqa: E402
+
+# Two fills of an open 5x5 that share exactly their first two across answers.
+FIRST = ["ABCDE", "FGHIJ", "KLMNO", "PQRST", "UVWXY"]
+SECOND = ["ABCDE", "FGHIJ", "ZZZZZ", "YYYYY", "XXXXX"]
+
+
+def fake_solve_grid(rows_by_call):
+    calls = iter(rows_by_call)
+
+    def solve_grid(width, height, black_cells, word_index, rng, time_limit_s, **kwargs):
+        rows = next(calls)
+        slots, _ = extract_slots(width, height, tuple(black_cells))
+        letters = {(r, c): rows[r][c] for r in range(height) for c in range(width)}
+        answers = {"".join(letters[cell] for cell in slot.cells) for slot in slots}
+        # Stands in for the reject policy: an avoided answer makes the fill unsolvable.
+        if answers & set(kwargs.get("avoid_words") or ()):
+            return None
+        return letters, slots
+
+    return solve_grid
+
+
+def fills(max_shared: int) -> list[set[str]]:
+    with mock.patch.object(generator, "pick_shape", return_value=(5, 5, [])), mock.patch.object(
+        generator, "solve_grid", fake_solve_grid([FIRST] + [SECOND] * 3)
+    ):
+        puzzles = generator.generate_fills(
+            None,
+            random.Random(0),
+            1.0,
+            puzzle_hash,
+            lambda hash_hex: hash_hex[:8],
+            fills=2,
+            max_shared=max_shared,
+        )
+        return [generator.puzzle_answers(puzzle) for puzzle in puzzles]
+
+
+def test_max_shared_allows_up_to_n_shared_answers():
+    first, second = fills(max_shared=2)
+    assert first & second == {"ABCDE", "FGHIJ"}
+
+
+def test_fill_sharing_more_than_max_shared_is_dropped():
+    assert len(fills(max_shared=1)) == 1
+
+
+def test_zero_max_shared_avoids_earlier_answers():
+    assert len(fills(max_shared=0)) == 1
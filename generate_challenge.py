@@ -5,7 +5,9 @@ import os
 import re
 import shutil
 import sys
-from typing import List, Set
+from typing import Set
+
+from puzzle_manifest import CURVES, parse_size, refresh_manifest, remove_from_manifest, select_puzzles
 
 
 ROOT = os.path.dirname(os.path.abspath(__file__))
@@ -37,16 +39,6 @@ def write_catalog(path: str, catalog: dict) -> None:
         json.dump(catalog, handle, indent=2, ensure_ascii=True)
         handle.write("\n")
 
-def list_bank_puzzles() -> List[str]:
-    if not os.path.isdir(BANK_DIR):
-        return []
-    return sorted(
-        name
-        for name in os.listdir(BANK_DIR)
-        if name.startswith("puzzle_") and name.endswith(".json")
-    )
-
-
 def unique_id(base: str, existing: Set[str]) -> str:
     if base not in existing:
         return base
@@ -63,13 +55,38 @@ def main() -> int:
     parser.add_argument("--name", required=True, help="Challenge display name.")
     parser.add_argument("--count", type=int, default=20, help="Number of puzzles in the challenge.")
     parser.add_argument("--id", default=None, help="Optional challenge id override.")
+    parser.add_argument(
+        "--sizes",
+        nargs="*",
+        type=parse_size,
+        default=None,
+        help="Grid sizes to draw from in rotation, e.g. 5x5 6x6 (default: every size in the bank).",
+    )
+    parser.add_argument(
+        "--unique-answers",
+        action="store_true",
+        help="Never repeat an answer within the challenge.",
+    )
+    parser.add_argument(
+        "--curve",
+        choices=CURVES,
+        default="bank",
+        help="Puzzle order: bank order, easiest-to-hardest ramp, or weekly ramps.",
+    )
     args = parser.parse_args()
 
     count = max(1, args.count)
-    bank_puzzles = list_bank_puzzles()
-    if len(bank_puzzles) < count:
+    manifest = refresh_manifest(BANK_DIR)
+    selected = select_puzzles(
+        manifest,
+        count,
+        sizes=args.sizes,
+        unique_answers=args.unique_answers,
+        curve=args.curve,
+    )
+    if len(selected) < count:
         print(
-            f"Not enough puzzles in {BANK_DIR}. Need {count}, found {len(bank_puzzles)}.",
+            f"Not enough matching puzzles in {BANK_DIR}. Need {count}, found {len(selected)}.",
             file=sys.stderr
         )
         return 1
@@ -94,11 +111,13 @@ def main() -> int:
 
     os.makedirs(resource_dir, exist_ok=True)
     moved_files = []
-    for name in bank_puzzles[:count]:
+    for entry in selected:
+        name = entry["file"]
         src = os.path.join(BANK_DIR, name)
         dst = os.path.join(resource_dir, name)
         shutil.move(src, dst)
         moved_files.append(name)
+    remove_from_manifest(BANK_DIR, manifest, moved_files)
 
     challenge = {
         "id": challenge_id,
@@ -4,7 +4,8 @@ import datetime as dt
 import json
 import os
 import sys
-from typing import List
+
+from puzzle_manifest import CURVES, parse_size, refresh_manifest, remove_from_manifest, select_puzzles
 
 
 ROOT = os.path.dirname(os.path.abspath(__file__))
@@ -12,16 +13,6 @@ BANK_DIR = os.path.join(ROOT, "Puzzles", "Puzzles_FINISHED")
 OUTPUT_DIR = os.path.join(ROOT, "mini-crossword", "Resources", "Puzzles")
 
 
-def list_bank_puzzles() -> List[str]:
-    if not os.path.isdir(BANK_DIR):
-        return []
-    return sorted(
-        name
-        for name in os.listdir(BANK_DIR)
-        if name.startswith("puzzle_") and name.endswith(".json")
-    )
-
-
 def parse_date(value: str) -> dt.date:
     try:
         return dt.date.fromisoformat(value)
@@ -52,32 +43,60 @@ def main() -> int:
         default=dt.date.today().replace(day=1),
         help="Start date (YYYY-MM-DD). Defaults to first of current month.",
     )
+    parser.add_argument(
+        "--sizes",
+        nargs="*",
+        type=parse_size,
+        default=None,
+        help="Grid sizes to rotate through day by day, e.g. 5x5 6x6 (default: bank order).",
+    )
+    parser.add_argument(
+        "--answer-window",
+        type=int,
+        default=0,
+        help="Do not repeat an answer within this many consecutive days (0 = no check).",
+    )
+    parser.add_argument(
+        "--curve",
+        choices=CURVES,
+        default="bank",
+        help="Difficulty order: bank order, one ramp, or easy-to-hard within each week.",
+    )
     args = parser.parse_args()
 
     count = max(1, args.count)
-    bank_puzzles = list_bank_puzzles()
-    if len(bank_puzzles) < count:
+    manifest = refresh_manifest(BANK_DIR)
+    selected = select_puzzles(
+        manifest,
+        count,
+        sizes=args.sizes,
+        answer_window=args.answer_window,
+        curve=args.curve,
+    )
+    if len(selected) < count:
         print(
-            f"Not enough puzzles in {BANK_DIR}. Need {count}, found {len(bank_puzzles)}.",
+            f"Not enough matching puzzles in {BANK_DIR}. Need {count}, found {len(selected)}.",
             file=sys.stderr
         )
         return 1
 
-    for offset in range(count):
-        date_value = args.start_date + dt.timedelta(days=offset)
-        date_str = date_value.isoformat()
-        output_name = f"puzzle_{date_str}.json"
-        output_path = os.path.join(OUTPUT_DIR, output_name)
+    # Check every date up front so a clash cannot leave a half-assigned batch.
+    assignments = []
+    for offset, entry in enumerate(selected):
+        date_str = (args.start_date + dt.timedelta(days=offset)).isoformat()
+        output_path = os.path.join(OUTPUT_DIR, f"puzzle_{date_str}.json")
         if os.path.exists(output_path):
             print(f"Puzzle already exists for {date_str}: {output_path}", file=sys.stderr)
             return 1
+        assignments.append((date_str, output_path, entry["file"]))
 
-        source_name = bank_puzzles[offset]
+    for date_str, output_path, source_name in assignments:
         source_path = os.path.join(BANK_DIR, source_name)
         puzzle = load_puzzle(source_path)
         puzzle["date"] = date_str
         write_puzzle(output_path, puzzle)
         os.remove(source_path)
+    remove_from_manifest(BANK_DIR, manifest, [source_name for _, _, source_name in assignments])
 
     print(f"Assigned {count} daily puzzles starting {args.start_date.isoformat()}.")
     return 0
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import os
+import sys
+from typing import Dict, Iterable, List, Optional, Set
+
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+BANK_DIR = os.path.join(ROOT, "Puzzles", "Puzzles_FINISHED")
+MANIFEST_NAME = "_manifest.json"
+MANIFEST_VERSION = 1
+CURVES = ["bank", "ramp", "weekly"]
+
+
+def manifest_path(bank_dir: str) -> str:
+    return os.path.join(bank_dir, MANIFEST_NAME)
+
+
+def puzzle_answers(puzzle: dict) -> List[str]:
+    answers: List[str] = []
+    for entries in puzzle.get("entries", {}).values():
+        for entry in entries:
+            answer = entry.get("answer")
+            if answer:
+                answers.append(answer)
+    return answers
+
+
+def difficulty_metrics(puzzle: dict, answers: List[str]) -> dict:
+    width = puzzle.get("width", 0)
+    height = puzzle.get("height", 0)
+    black_count = len(puzzle.get("blackCells", []))
+    open_cells = width * height - black_count
+    avg_length = sum(len(answer) for answer in answers) / len(answers) if answers else 0.0
+    long_answers = sum(1 for answer in answers if len(answer) >= 6)
+    # Heuristic: bigger open grids with longer answers take longer to solve.
+    score = open_cells / 10 + avg_length + long_answers / 2
+    return {
+        "openCells": open_cells,
+        "wordCount": len(answers),
+        "avgAnswerLength": round(avg_length, 3),
+        "longAnswers": long_answers,
+        "score": round(score, 3),
+    }
+
+
+def manifest_entry(bank_dir: str, name: str) -> Optional[dict]:
+    path = os.path.join(bank_dir, name)
+    try:
+        with open(path, "r", encoding="utf-8") as handle:
+            puzzle = json.load(handle)
+    except (OSError, json.JSONDecodeError):
+        return None
+    answers = puzzle_answers(puzzle)
+    return {
+        "id": puzzle.get("id", ""),
+        "file": name,
+        "width": puzzle.get("width", 0),
+        "height": puzzle.get("height", 0),
+        "blackCount": len(puzzle.get("blackCells", [])),
+        "answers": answers,
+        "difficulty": difficulty_metrics(puzzle, answers),
+        "mtime": os.path.getmtime(path),
+    }
+
+
+def load_manifest(bank_dir: str) -> Dict[str, dict]:
+    path = manifest_path(bank_dir)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as handle:
+            data = json.load(handle)
+    except json.JSONDecodeError:
+        return {}
+    if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION:
+        return {}
+    return {entry["file"]: entry for entry in data.get("puzzles", [])}
+
+
+def save_manifest(bank_dir: str, entries: Dict[str, dict]) -> None:
+    path = manifest_path(bank_dir)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    payload = {"version": MANIFEST_VERSION, "puzzles": [entries[name] for name in sorted(entries)]}
+    with open(tmp_path, "w", encoding="utf-8") as handle:
+        json.dump(payload, handle, separators=(",", ":"), ensure_ascii=True)
+        handle.write("\n")
+    os.replace(tmp_path, path)
+
+
+def refresh_manifest(bank_dir: str = BANK_DIR) -> Dict[str, dict]:
+    # Only new or modified puzzle files are parsed; everything else comes from the manifest.
+    entries = load_manifest(bank_dir)
+    if not os.path.isdir(bank_dir):
+        return {}
+    seen: Set[str] = set()
+    changed = False
+    with os.scandir(bank_dir) as listing:
+        for item in listing:
+            name = item.name
+            if not (name.startswith("puzzle_") and name.endswith(".json")):
+                continue
+            seen.add(name)
+            cached = entries.get(name)
+            if cached is not None and cached.get("mtime") == item.stat().st_mtime:
+                continue
+            entry = manifest_entry(bank_dir, name)
+            if entry is not None:
+                entries[name] = entry
+                changed = True
+    for name in set(entries) - seen:
+        del entries[name]
+        changed = True
+    if changed or not os.path.exists(manifest_path(bank_dir)):
+        save_manifest(bank_dir, entries)
+    return entries
+
+
+def remove_from_manifest(bank_dir: str, entries: Dict[str, dict], names: Iterable[str]) -> None:
+    for name in names:
+        entries.pop(name, None)
+    save_manifest(bank_dir, entries)
+
+
+def parse_size(value: str) -> tuple:
+    try:
+        width, height = (int(part) for part in value.lower().split("x"))
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError("Size must look like 5x6.") from exc
+    return width, height
+
+
+def apply_curve(selected: List[dict], curve: str) -> List[dict]:
+    if curve == "ramp":
+        return sorted(selected, key=lambda entry: entry["difficulty"]["score"])
+    if curve == "weekly":
+        # Easiest first within each block of seven, like a Monday-to-Sunday week.
+        ordered: List[dict] = []
+        for start in range(0, len(selected), 7):
+            week = selected[start : start + 7]
+            ordered.extend(sorted(week, key=lambda entry: entry["difficulty"]["score"]))
+        return ordered
+    return selected
+
+
+def select_puzzles(
+    entries: Dict[str, dict],
+    count: int,
+    sizes: Optional[List[tuple]] = None,
+    unique_answers: bool = False,
+    answer_window: int = 0,
+    curve: str = "bank",
+) -> List[dict]:
+    # With sizes given, per-size buckets (each in bank order) are drawn round-robin to
+    # keep the mix even; otherwise the whole bank is one bucket in file order.
+    buckets: Dict[Optional[tuple], List[dict]] = {}
+    for name in sorted(entries):
+        entry = entries[name]
+        size = (entry["width"], entry["height"])
+        if sizes and size not in sizes:
+            continue
+        buckets.setdefault(size if sizes else None, []).append(entry)
+    order: List[Optional[tuple]] = list(sizes) if sizes else [None]
+    cursors = {size: 0 for size in order}
+
+    selected: List[dict] = []
+    used_answers: Set[str] = set()
+    recent: List[Set[str]] = []
+    while len(selected) < count:
+        progressed = False
+        for size in order:
+            if len(selected) >= count:
+                break
+            bucket = buckets.get(size, [])
+            while cursors[size] < len(bucket):
+                entry = bucket[cursors[size]]
+                cursors[size] += 1
+                answers = set(entry["answers"])
+                if unique_answers and answers & used_answers:
+                    continue
+                if answer_window and any(answers & previous for previous in recent[-answer_window:]):
+                    continue
+                selected.append(entry)
+                if unique_answers:
+                    used_answers |= answers
+                recent.append(answers)
+                progressed = True
+                break
+        if not progressed:
+            break
+    return apply_curve(selected, curve)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Refresh and query the finished-bank manifest.")
+    parser.add_argument("--bank-dir", default=BANK_DIR, help="Finished puzzle bank directory.")
+    parser.add_argument("--rebuild", action="store_true", help="Reparse every puzzle file.")
+    args = parser.parse_args()
+
+    if args.rebuild and os.path.exists(manifest_path(args.bank_dir)):
+        os.remove(manifest_path(args.bank_dir))
+    entries = refresh_manifest(args.bank_dir)
+    if not entries:
+        print(f"No puzzles found in {args.bank_dir}", file=sys.stderr)
+        return 1
+
+    sizes: Dict[str, int] = {}
+    for entry in entries.values():
+        key = f"{entry['width']}x{entry['height']}"
+        sizes[key] = sizes.get(key, 0) + 1
+    mix = ", ".join(f"{key}: {sizes[key]}" for key in sorted(sizes))
+    print(f"Manifest: {len(entries)} puzzles ({mix})")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -10,6 +10,7 @@ RES_PUZZLES_DIR = os.path.join(ROOT, "mini-crossword", "Resources", "Puzzles")
 RES_CHALLENGES_DIR = os.path.join(ROOT, "mini-crossword", "Resources", "Challenges")
 RES_CHALLENGES_CATALOG = os.path.join(RES_CHALLENGES_DIR, "challenges.json")
 LEGACY_CHALLENGES_DIR = os.path.join(ROOT, "Puzzles", "Challenges")
+ANSWER_INDEX_PATH = os.path.join(ROOT, "crossword-engine", ".cache", "answer_index.jsonl")
 
 
 def remove_puzzle_files() -> int:
@@ -54,11 +55,18 @@ def remove_legacy_challenges() -> int:
     return 0
 
 
+def remove_answer_index() -> None:
+    # The engine rebuilds it from the remaining puzzles on its next run.
+    if os.path.exists(ANSWER_INDEX_PATH):
+        os.remove(ANSWER_INDEX_PATH)
+
+
 def main() -> int:
     puzzles_removed = remove_puzzle_files()
     challenges_removed = remove_challenge_folders()
     reset_challenges_catalog()
     legacy_removed = remove_legacy_challenges()
+    remove_answer_index()
 
     print(
         "Reset complete: removed "